@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
@@ -24,13 +25,24 @@ class Settings(BaseSettings):
     anthropic_api_key: str
     claude_model: str = "claude-sonnet-4-5-20250929"
     max_tokens: int = 4096
+    # threads for the blocking claude.send calls (one per in-flight turn)
+    claude_concurrency: int = 8
+    # Upload inbound images with the Files API and reference them by ID,
+    # instead of inlining base64 in every request that replays the history
+    claude_image_uploads: bool = False
+    # Small, fast model for the spoken greeting at the start of a call
+    greeting_model: str = "claude-haiku-4-5"
 
     # Server
     server_host: str = "127.0.0.1"
     server_port: int = 8001
+    # DEBUG also dumps every webhook form field
+    log_level: str = "INFO"
 
     # Database
     database_url: str = f"sqlite:///{_project_root / 'conversations.db'}"
+    db_pool_size: int = 10
+    db_max_overflow: int = 5
 
     # Conversation
     conversation_timeout_minutes: int = 60
@@ -40,6 +52,11 @@ class Settings(BaseSettings):
     require_approval_for_bash: bool = True
     approval_timeout_seconds: int = 300
 
+    # Tools
+    tool_concurrency: int = 4
+    # Spawn every MCP server at startup instead of on its first call
+    mcp_prewarm: bool = True
+
     # WhatsApp
     max_message_length: int = 1600
 
@@ -56,3 +73,7 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
+
+# Derived values used on every message turn, computed once at startup
+CONVERSATION_TIMEOUT = timedelta(minutes=settings.conversation_timeout_minutes)
+MAX_CONVERSATION_MESSAGES = settings.max_conversation_messages
@@ -1,52 +1,107 @@
-import json
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
 
+import orjson
+from sqlalchemy import insert, update
+from sqlalchemy.orm import sessionmaker
 from sqlmodel import Session, select
 
-from .config import settings
+from .config import CONVERSATION_TIMEOUT, MAX_CONVERSATION_MESSAGES
 from .models import Conversation, Message
 
+# Content-block converters keyed on the block's exact type, resolved once
+# per type on first sight (see ConversationManager._block_to_dict).
+_BLOCK_CONVERTERS: Dict[type, Callable[[Any], dict]] = {dict: lambda b: b}
+
+# Conversations whose recent history is kept in memory. The bridge serves a
+# single approved number, so only a handful are ever live at once.
+_HISTORY_CACHE_SIZE = 16
+
+
+class _HistoryRow(NamedTuple):
+    """A Message row as get_messages needs it, with content already decoded."""
+
+    role: str
+    content: Any
+    tool_use_id: Optional[str]
+
+
+def _decode_content(role: str, stored: str) -> Any:
+    """Turn a stored content string back into what the API expects."""
+    if role == "assistant":
+        try:
+            return orjson.loads(stored)
+        except orjson.JSONDecodeError:
+            return stored
+    # User content may be plain text or JSON-encoded blocks (media). Only a
+    # leading "[" can be a block list, so ordinary text skips the decode.
+    if role == "user" and stored.startswith("["):
+        try:
+            parsed = orjson.loads(stored)
+            if isinstance(parsed, list):
+                return parsed
+        except orjson.JSONDecodeError:
+            pass
+    return stored
+
 
 class ConversationManager:
     """Persist and retrieve conversation history in SQLite."""
 
     def __init__(self, engine) -> None:
         self.engine = engine
+        # Built once and reused for every call. Rows stay readable after
+        # their session closes, so no refresh round-trip is needed.
+        self._session = sessionmaker(
+            bind=engine, class_=Session, expire_on_commit=False
+        )
+        # conversation_id -> last MAX_CONVERSATION_MESSAGES rows, oldest
+        # first, each decoded once. Loaded on first read, then kept current
+        # by add_message (write-through), so later reads neither touch the
+        # database nor re-parse stored JSON.
+        self._history: "OrderedDict[int, List[_HistoryRow]]" = OrderedDict()
+        # Methods are called from worker threads; this guards the cache's
+        # LRU bookkeeping (a conversation's own rows are only ever touched
+        # by whoever holds that conversation's lock in main).
+        self._history_lock = threading.Lock()
+        # Serialises the find-or-create of a number's active conversation so
+        # two near-simultaneous messages can't each start a new one.
+        self._active_lock = threading.Lock()
 
     # ── conversations ────────────────────────────────────────────
 
     def get_or_create(self, phone_number: str) -> Conversation:
-        with Session(self.engine) as session:
+        with self._active_lock, self._session.begin() as session:
             stmt = select(Conversation).where(
                 Conversation.phone_number == phone_number,
                 Conversation.is_active == True,  # noqa: E712
             )
             conv = session.exec(stmt).first()
+            now = datetime.utcnow()
 
             # expire stale conversation
             if conv:
-                timeout = timedelta(minutes=settings.conversation_timeout_minutes)
-                if datetime.utcnow() - conv.last_activity > timeout:
+                if now - conv.last_activity > CONVERSATION_TIMEOUT:
                     conv.is_active = False
                     session.add(conv)
-                    session.commit()
+                    self._forget(conv.id)
                     conv = None
 
             if conv is None:
                 conv = Conversation(
                     phone_number=phone_number,
-                    started_at=datetime.utcnow(),
-                    last_activity=datetime.utcnow(),
+                    started_at=now,
+                    last_activity=now,
                 )
                 session.add(conv)
-                session.commit()
-                session.refresh(conv)
+                session.flush()  # assigns conv.id
 
             return conv
 
     def reset(self, phone_number: str) -> None:
-        with Session(self.engine) as session:
+        with self._active_lock, self._session.begin() as session:
             stmt = select(Conversation).where(
                 Conversation.phone_number == phone_number,
                 Conversation.is_active == True,  # noqa: E712
@@ -55,7 +110,7 @@ class ConversationManager:
             if conv:
                 conv.is_active = False
                 session.add(conv)
-                session.commit()
+                self._forget(conv.id)
 
     # ── messages ─────────────────────────────────────────────────
 
@@ -67,38 +122,76 @@ class ConversationManager:
         tool_use_id: Optional[str] = None,
         tool_name: Optional[str] = None,
     ) -> None:
+        self.add_messages(
+            conversation_id,
+            [{
+                "role": role,
+                "content": content,
+                "tool_use_id": tool_use_id,
+                "tool_name": tool_name,
+            }],
+        )
+
+    def add_messages(
+        self, conversation_id: int, messages: List[Dict[str, Any]]
+    ) -> None:
+        """Store several messages, in order, in a single transaction.
+
+        Each dict holds add_message's arguments: ``role`` and ``content``,
+        optionally ``tool_use_id`` and ``tool_name``.
+        """
         # Serialize list/dict content to JSON string for storage
-        if isinstance(content, (list, dict)):
-            stored = json.dumps(content)
-        else:
-            stored = content
-
-        with Session(self.engine) as session:
-            session.add(
-                Message(
-                    conversation_id=conversation_id,
-                    role=role,
-                    content=stored,
-                    tool_use_id=tool_use_id,
-                    tool_name=tool_name,
-                )
+        stored = [
+            orjson.dumps(m["content"]).decode()
+            if isinstance(m["content"], (list, dict))
+            else m["content"]
+            for m in messages
+        ]
+
+        # One multi-row INSERT + UPDATE in one transaction; the Conversation
+        # row is never loaded into Python. All rows share one timestamp
+        # (_load_history breaks the tie on id).
+        now = datetime.utcnow()
+        with self._session.begin() as session:
+            session.execute(
+                insert(Message),
+                [
+                    {
+                        "conversation_id": conversation_id,
+                        "role": m["role"],
+                        "content": raw,
+                        "created_at": now,
+                        "tool_use_id": m.get("tool_use_id"),
+                        "tool_name": m.get("tool_name"),
+                    }
+                    for m, raw in zip(messages, stored)
+                ],
             )
-            conv = session.get(Conversation, conversation_id)
-            if conv:
-                conv.last_activity = datetime.utcnow()
-                session.add(conv)
-            session.commit()
+            session.execute(
+                update(Conversation)
+                .where(Conversation.id == conversation_id)
+                .values(last_activity=now)
+            )
+
+        with self._history_lock:
+            history = self._history.get(conversation_id)
+        if history is not None:
+            for m, raw in zip(messages, stored):
+                content = m["content"]
+                # a list is exactly what decoding the stored JSON would give back
+                decoded = content if isinstance(content, list) else _decode_content(m["role"], raw)
+                history.append(_HistoryRow(m["role"], decoded, m.get("tool_use_id")))
+            del history[:-MAX_CONVERSATION_MESSAGES]
 
     def add_assistant_blocks(
         self, conversation_id: int, content_blocks: list
     ) -> None:
         """Store the raw assistant content-blocks as JSON."""
+        # add_message does the (single) JSON encode of the list
         self.add_message(
             conversation_id=conversation_id,
             role="assistant",
-            content=json.dumps(
-                [self._block_to_dict(b) for b in content_blocks]
-            ),
+            content=[self._block_to_dict(b) for b in content_blocks],
         )
 
     def get_messages(self, conversation_id: int) -> List[Dict[str, Any]]:
@@ -108,53 +201,43 @@ class ConversationManager:
         immediately after the "assistant" message that contained the
         corresponding tool_use block.  We group consecutive tool_result rows
         into one "user" message and strip orphaned tool results.
+
+        Decoded content is shared with the history cache; callers may extend
+        the returned list but must not mutate message content in place.
         """
-        with Session(self.engine) as session:
-            stmt = (
-                select(Message)
-                .where(Message.conversation_id == conversation_id)
-                .order_by(Message.created_at)
-            )
-            rows = list(session.exec(stmt).all())
+        rows = self._load_history(conversation_id)
 
-        # trim to the most recent N messages
-        if len(rows) > settings.max_conversation_messages:
-            rows = rows[-settings.max_conversation_messages :]
+        # Pre-pass: map every tool_use ID to the index of the assistant row
+        # that issued it.
+        tool_use_owner: Dict[str, int] = {}
+        for i, row in enumerate(rows):
+            if row.role == "assistant" and isinstance(row.content, list):
+                for b in row.content:
+                    if isinstance(b, dict) and b.get("type") == "tool_use":
+                        tool_use_owner[b.get("id")] = i
 
         messages: List[Dict[str, Any]] = []
-        # Collect tool_use IDs present in the last assistant message
-        pending_tool_ids: set = set()
+        # Row index of the assistant message that tool results may answer;
+        # -1 once a user message has intervened.
+        last_assistant = -1
+        # Content list of the tool_result user message currently being
+        # filled; None once any other message has been appended.
+        tr_bucket: Optional[List[Dict[str, Any]]] = None
 
-        for row in rows:
+        for i, row in enumerate(rows):
             if row.role == "user":
-                pending_tool_ids.clear()
-                # Content may be plain text or JSON-encoded blocks (media)
-                try:
-                    parsed = json.loads(row.content)
-                    if isinstance(parsed, list):
-                        content = parsed
-                    else:
-                        content = row.content
-                except (json.JSONDecodeError, TypeError):
-                    content = row.content
-                messages.append({"role": "user", "content": content})
+                last_assistant = -1
+                tr_bucket = None
+                messages.append({"role": "user", "content": row.content})
 
             elif row.role == "assistant":
-                pending_tool_ids.clear()
-                try:
-                    blocks = json.loads(row.content)
-                except (json.JSONDecodeError, TypeError):
-                    blocks = row.content
-                # Track which tool_use IDs this assistant message contains
-                if isinstance(blocks, list):
-                    for b in blocks:
-                        if isinstance(b, dict) and b.get("type") == "tool_use":
-                            pending_tool_ids.add(b.get("id"))
-                messages.append({"role": "assistant", "content": blocks})
+                last_assistant = i
+                tr_bucket = None
+                messages.append({"role": "assistant", "content": row.content})
 
             elif row.role == "tool_result":
                 # Only include if this tool_use_id was in the last assistant msg
-                if row.tool_use_id not in pending_tool_ids:
+                if last_assistant < 0 or tool_use_owner.get(row.tool_use_id) != last_assistant:
                     continue  # orphaned tool result — skip
 
                 result_block = {
@@ -162,20 +245,12 @@ class ConversationManager:
                     "tool_use_id": row.tool_use_id,
                     "content": row.content,
                 }
-                # Merge into previous user message if it's already a tool_result list
-                if (
-                    messages
-                    and messages[-1]["role"] == "user"
-                    and isinstance(messages[-1]["content"], list)
-                    and messages[-1]["content"]
-                    and isinstance(messages[-1]["content"][0], dict)
-                    and messages[-1]["content"][0].get("type") == "tool_result"
-                ):
-                    messages[-1]["content"].append(result_block)
+                # Merge into the tool_result message already being built
+                if tr_bucket is not None:
+                    tr_bucket.append(result_block)
                 else:
-                    messages.append(
-                        {"role": "user", "content": [result_block]}
-                    )
+                    tr_bucket = [result_block]
+                    messages.append({"role": "user", "content": tr_bucket})
 
         # Final safety: ensure alternating user/assistant roles
         # Strip any leading assistant messages (API requires user first)
@@ -186,11 +261,50 @@ class ConversationManager:
 
     # ── helpers ───────────────────────────────────────────────────
 
+    def _load_history(self, conversation_id: int) -> List[_HistoryRow]:
+        """Return the cached history window, reading it from the DB on a miss."""
+        with self._history_lock:
+            history = self._history.get(conversation_id)
+            if history is not None:
+                self._history.move_to_end(conversation_id)
+                return history
+
+        # fetch only the most recent N messages, newest first, then flip
+        with self._session() as session:
+            stmt = (
+                select(Message.role, Message.content, Message.tool_use_id)
+                .where(Message.conversation_id == conversation_id)
+                .order_by(Message.created_at.desc(), Message.id.desc())
+                .limit(MAX_CONVERSATION_MESSAGES)
+            )
+            history = [
+                _HistoryRow(role, _decode_content(role, content), tool_use_id)
+                for role, content, tool_use_id in session.exec(stmt)
+            ]
+        history.reverse()
+
+        with self._history_lock:
+            self._history[conversation_id] = history
+            if len(self._history) > _HISTORY_CACHE_SIZE:
+                self._history.popitem(last=False)
+        return history
+
+    def _forget(self, conversation_id: int) -> None:
+        """Drop a deactivated conversation's cached history."""
+        with self._history_lock:
+            self._history.pop(conversation_id, None)
+
     @staticmethod
     def _block_to_dict(block) -> dict:
         """Convert an Anthropic content-block object to a plain dict."""
-        if hasattr(block, "model_dump"):
-            return block.model_dump()
-        if isinstance(block, dict):
-            return block
-        return {"type": "text", "text": str(block)}
+        t = type(block)
+        convert = _BLOCK_CONVERTERS.get(t)
+        if convert is None:
+            if hasattr(t, "model_dump"):
+                convert = t.model_dump
+            elif issubclass(t, dict):
+                convert = _BLOCK_CONVERTERS[dict]
+            else:
+                convert = lambda b: {"type": "text", "text": str(b)}  # noqa: E731
+            _BLOCK_CONVERTERS[t] = convert
+        return convert(block)
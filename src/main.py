@@ -7,12 +7,21 @@ Start with:  uv run python -m src.main
 """
 
 import asyncio
-import json
+import contextlib
+import hashlib
+import logging
+import queue
 import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener
 
+import orjson
 from fastapi import FastAPI, Request, WebSocket
 from fastapi.responses import JSONResponse, Response
+from sqlalchemy import case, event, insert, make_url, update
+from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel, Session, create_engine, select
 
 from .config import settings
@@ -20,25 +29,92 @@ from .models import Conversation, Message, PendingApproval  # noqa: F401 (regist
 from .claude_client import ClaudeClient
 from .conversation_manager import ConversationManager
 from .whatsapp_handler import WhatsAppHandler
-from .media_handler import process_inbound_media
+from .media_handler import close_client as close_media_client, process_inbound_media
 from .tools.bash_tool import BashTool
 from .tools.file_tool import FileReadTool, FileWriteTool
-from .tools.web_search_tool import WebSearchTool
-from .tools.mcp_tool import MCPBridgeTool, shutdown_all_mcp
+from .tools.web_search_tool import WebSearchTool, close_client as close_search_client
+from .tools.mcp_tool import MCP_SERVERS, MCPBridgeTool, prewarm_all_mcp, shutdown_all_mcp
 from .tools.send_media_tool import SendWhatsAppMediaTool
-from .voice_handler import handle_voice_websocket, build_voice_twiml
+from .voice_handler import (
+    build_voice_twiml,
+    close_client as close_voice_client,
+    handle_voice_websocket,
+    prefetch_greeting,
+)
 
 # ── Initialise components ────────────────────────────────────────
 
+log = logging.getLogger(__name__)
+
+
+def _setup_logging() -> QueueListener:
+    """Send log records through a queue, written to stderr by one thread.
+
+    Request handlers and background tasks only enqueue a record, so they
+    never block on the console.
+    """
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(q))
+    root.setLevel(settings.log_level.upper())
+    listener = QueueListener(q, handler)
+    listener.start()
+    return listener
+
+
+_log_listener = _setup_logging()
+# mcp_tool reads settings.json at import, before logging was configured
+log.info("[MCP] Loaded %d servers: %s", len(MCP_SERVERS), ", ".join(MCP_SERVERS))
+
 app = FastAPI(title="WhatsApp-Claude Bridge")
 
 
+@app.on_event("startup")
+async def _startup_event():
+    """Warm up MCP servers in the background; startup doesn't wait on them."""
+    if settings.mcp_prewarm and MCP_SERVERS:
+        task = asyncio.ensure_future(prewarm_all_mcp())
+        task.add_done_callback(_task_done)
+
+
 @app.on_event("shutdown")
 async def _shutdown_event():
     """Clean up persistent MCP server connections on exit."""
     await shutdown_all_mcp()
-
-engine = create_engine(settings.database_url, echo=False)
+    await whatsapp.aclose()
+    await close_media_client()
+    await close_search_client()
+    await close_voice_client()
+    _claude_executor.shutdown(wait=False, cancel_futures=True)
+    _log_listener.stop()
+
+
+def _sqlite_pragmas(dbapi_conn, _record) -> None:
+    """WAL + synchronous=NORMAL: one fsync per checkpoint instead of per commit."""
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+
+def _engine_options(database_url: str) -> dict:
+    """Connection-pool settings for the configured database."""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # one shared connection, or each thread would see its own empty DB
+        return {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+    pool = {"pool_size": settings.db_pool_size, "max_overflow": settings.db_max_overflow}
+    if url.get_backend_name() == "sqlite":
+        # file DB: pooled and shareable across threads by default
+        return pool
+    return {**pool, "pool_pre_ping": True, "pool_recycle": 1800}
+
+
+engine = create_engine(settings.database_url, echo=False, **_engine_options(settings.database_url))
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", _sqlite_pragmas)
 SQLModel.metadata.create_all(engine)
 
 tools = [BashTool(), FileReadTool(), FileWriteTool(), WebSearchTool(), MCPBridgeTool(), SendWhatsAppMediaTool()]
@@ -46,11 +122,34 @@ claude = ClaudeClient(tools=tools)
 conversations = ConversationManager(engine)
 whatsapp = WhatsAppHandler()
 
-# guard against concurrent processing per conversation
-_busy: dict[int, bool] = {}
+# Claude calls block for seconds at a time; give them their own threads so
+# they can't starve the default executor used for DB work
+_claude_executor = ThreadPoolExecutor(
+    max_workers=settings.claude_concurrency, thread_name_prefix="claude"
+)
+
+# one lock per conversation: a message that arrives while the previous one
+# is still being handled waits its turn (FIFO) instead of being bounced
+_conv_locks: dict[int, asyncio.Lock] = {}
+
+# approval_id -> future resolved by _handle_approval with the status the
+# user's response wrote, so the waiter needn't read it back from the DB
+_approval_waiters: dict[str, asyncio.Future] = {}
+
+# MessageSids already accepted, so Twilio's retried deliveries are dropped
+_seen_sids: OrderedDict[str, None] = OrderedDict()
+_SEEN_SIDS_MAX = 4096
 
 MAX_TOOL_TURNS = 10
 
+# caps how many tool calls from one response run at the same time
+_tool_sem = asyncio.Semaphore(settings.tool_concurrency)
+# serialises the tools that can require approval (bash, file writes)
+_side_effect_lock = asyncio.Lock()
+
+# PendingApproval.tool_input is an audit record; cap what each row stores
+_APPROVAL_INPUT_MAX = 4096
+
 
 # ── Routes ───────────────────────────────────────────────────────
 
@@ -74,13 +173,15 @@ async def voice_incoming(request: Request):
     form = await request.form()
     from_number = (form.get("From") or "").replace("whatsapp:", "")
     call_sid = form.get("CallSid", "unknown")
-    print(f"[VOICE] Incoming call from {from_number}, CallSid={call_sid}", flush=True)
+    log.info("[VOICE] Incoming call from %s, CallSid=%s", from_number, call_sid)
+    # write the greeting while Twilio fetches the TwiML and opens the socket
+    prefetch_greeting(call_sid)
 
     # Build the WebSocket URL from this request's host
     host = request.headers.get("host", f"{settings.server_host}:{settings.server_port}")
     # Use wss:// since ngrok provides TLS
     ws_url = f"wss://{host}/ws"
-    print(f"[VOICE] ConversationRelay WebSocket URL: {ws_url}", flush=True)
+    log.info("[VOICE] ConversationRelay WebSocket URL: %s", ws_url)
 
     twiml = build_voice_twiml(ws_url)
     return Response(content=twiml, media_type="text/xml")
@@ -96,30 +197,43 @@ async def voice_websocket(ws: WebSocket):
 async def webhook(request: Request):
     form = await request.form()
 
-    # ── debug: log everything Twilio sends ──
-    print("[WEBHOOK POST] All form fields:")
-    for key, value in form.items():
-        print(f"  {key} = {value}")
-
-    from_raw = form.get("From", "")
     body = (form.get("Body") or "").strip()
     status = form.get("MessageStatus")
 
     # ignore status-only callbacks
     if status and not body:
-        print(f"[STATUS CALLBACK] {status} - ignoring")
+        log.debug("[STATUS CALLBACK] %s - ignoring", status)
         return JSONResponse({"status": "ok"})
 
+    # ignore redelivery of a message we've already accepted
+    message_sid = form.get("MessageSid")
+    if message_sid and message_sid in _seen_sids:
+        log.info("[DUPLICATE] %s - ignoring", message_sid)
+        return JSONResponse({"status": "ok"})
+
+    # ── debug: log everything Twilio sends ──
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(
+            "[WEBHOOK POST] All form fields:\n%s",
+            "\n".join(f"  {key} = {value}" for key, value in form.items()),
+        )
+
+    from_raw = form.get("From", "")
+
     from_number = from_raw.replace("whatsapp:", "")
-    print(f"[FROM] raw={from_raw!r} -> cleaned={from_number!r}")
-    print(f"[EXPECTED] {settings.approved_phone_number!r}")
+    log.debug("[FROM] raw=%r -> cleaned=%r", from_raw, from_number)
 
     # ── security: only the authorised number ──
     if from_number != settings.approved_phone_number:
-        print(f"[REJECT] {from_number!r} != {settings.approved_phone_number!r}")
+        log.warning("[REJECT] %r != %r", from_number, settings.approved_phone_number)
         return JSONResponse({"status": "unauthorized"})
 
-    print(f"[MSG] {from_number}: {body[:80]}")
+    log.info("[MSG] %s: %s", from_number, body[:80])
+
+    if message_sid:
+        _seen_sids[message_sid] = None
+        if len(_seen_sids) > _SEEN_SIDS_MAX:
+            _seen_sids.popitem(last=False)
 
     # ── extract media attachments ──
     num_media = int(form.get("NumMedia", "0"))
@@ -129,26 +243,20 @@ async def webhook(request: Request):
         ct = form.get(f"MediaContentType{i}", "application/octet-stream")
         if url:
             media_items.append({"url": url, "content_type": ct})
-            print(f"[MEDIA] Attachment {i}: {ct} -> {url[:80]}")
+            log.info("[MEDIA] Attachment %d: %s -> %s", i, ct, url[:80])
 
     # ── special commands ──
-    upper = body.upper()
-
-    if upper == "/RESET":
-        conversations.reset(from_number)
-        whatsapp.send_message(from_number, "Conversation reset. Starting fresh!")
-        return JSONResponse({"status": "ok"})
-
-    if upper.startswith("APPROVE ") or upper.startswith("DENY "):
-        _handle_approval(from_number, body)
+    # dispatch on the first word only; a long caption is never uppercased
+    word, _, arg = body.partition(" ")
+    command = _COMMANDS.get(word.upper())
+    if command and await command(from_number, body, arg):
         return JSONResponse({"status": "ok"})
 
     # ── normal message -> Claude ──
     # run in background so Twilio gets a quick 200
-    print(f"[WEBHOOK] Creating _process task for: {body[:60]}", flush=True)
     task = asyncio.ensure_future(_process(from_number, body, media_items))
     task.add_done_callback(_task_done)
-    print(f"[WEBHOOK] Task created: {task!r}", flush=True)
+    log.debug("[WEBHOOK] Task created: %r", task)
     return JSONResponse({"status": "ok"})
 
 
@@ -157,49 +265,99 @@ def _task_done(task: asyncio.Task) -> None:
     try:
         exc = task.exception()
         if exc:
-            import traceback
-            print(f"[TASK ERROR] Unhandled exception in _process:")
-            traceback.print_exception(type(exc), exc, exc.__traceback__)
+            log.error(
+                "[TASK ERROR] Unhandled exception in %s",
+                task.get_coro().__qualname__, exc_info=exc,
+            )
     except asyncio.CancelledError:
         pass
 
 
 # ── Approval handling ────────────────────────────────────────────
 
-def _handle_approval(from_number: str, body: str) -> None:
+async def _handle_approval(from_number: str, body: str) -> None:
     parts = body.upper().split(maxsplit=1)
     if len(parts) != 2:
-        whatsapp.send_message(from_number, "Invalid format. Use: APPROVE <id> or DENY <id>")
+        await whatsapp.send_message_async(from_number, "Invalid format. Use: APPROVE <id> or DENY <id>")
         return
 
     action, approval_id = parts
     new_status = "approved" if action == "APPROVE" else "denied"
 
-    with Session(engine) as session:
-        stmt = select(PendingApproval).where(
+    # DB work runs in a worker thread so the event loop isn't blocked
+    outcome = await asyncio.to_thread(_resolve_approval, approval_id, new_status)
+
+    if outcome is None:
+        await whatsapp.send_message_async(from_number, f"Approval {approval_id} not found or already handled.")
+        return
+
+    if outcome == "expired":
+        await whatsapp.send_message_async(from_number, f"Approval {approval_id} has expired.")
+        return
+
+    # wake the waiting _request_approval
+    waiter = _approval_waiters.pop(approval_id, None)
+    if waiter and not waiter.done():
+        waiter.set_result(outcome)
+
+    icon = "\u2705" if new_status == "approved" else "\u274c"
+    await whatsapp.send_message_async(from_number, f"{icon} Request {approval_id} {new_status}.")
+
+
+def _resolve_approval(approval_id: str, new_status: str) -> str | None:
+    """Record the user's response to a pending approval.
+
+    Returns the status written ("approved", "denied" or "expired"), or None
+    if there is no pending approval with this ID.
+    """
+    now = datetime.utcnow()
+    expired = PendingApproval.expires_at < now
+    # single UPDATE ... RETURNING: a pending row past its deadline becomes
+    # "expired", otherwise it takes the user's answer
+    stmt = (
+        update(PendingApproval)
+        .where(
             PendingApproval.approval_id == approval_id,
             PendingApproval.status == "pending",
         )
-        approval = session.exec(stmt).first()
-
-        if not approval:
-            whatsapp.send_message(from_number, f"Approval {approval_id} not found or already handled.")
-            return
-
-        if datetime.utcnow() > approval.expires_at:
-            approval.status = "expired"
-            session.add(approval)
-            session.commit()
-            whatsapp.send_message(from_number, f"Approval {approval_id} has expired.")
-            return
-
-        approval.status = new_status
-        approval.responded_at = datetime.utcnow()
-        session.add(approval)
+        .values(
+            status=case((expired, "expired"), else_=new_status),
+            responded_at=case((expired, None), else_=now),
+        )
+        .returning(PendingApproval.status)
+    )
+    with Session(engine) as session:
+        status = session.execute(stmt).scalar()
         session.commit()
+    return status
 
-    icon = "\u2705" if new_status == "approved" else "\u274c"
-    whatsapp.send_message(from_number, f"{icon} Request {approval_id} {new_status}.")
+
+# ── Commands ─────────────────────────────────────────────────────
+
+async def _cmd_reset(from_number: str, body: str, arg: str) -> bool:
+    if arg:
+        return False  # "/reset something" is an ordinary message
+    await asyncio.to_thread(conversations.reset, from_number)
+    await whatsapp.send_message_async(from_number, "Conversation reset. Starting fresh!")
+    return True
+
+
+async def _cmd_approval(from_number: str, body: str, arg: str) -> bool:
+    if not arg:
+        return False  # a bare "approve" is an ordinary message
+    # resolve in the background, like _process, so Twilio gets a quick 200
+    task = asyncio.ensure_future(_handle_approval(from_number, body))
+    task.add_done_callback(_task_done)
+    return True
+
+
+# first word (uppercased) -> handler; a handler returns False to let the
+# message through to Claude
+_COMMANDS = {
+    "/RESET": _cmd_reset,
+    "APPROVE": _cmd_approval,
+    "DENY": _cmd_approval,
+}
 
 
 # ── Media processing ──────────────────────────────────────────────
@@ -215,11 +373,19 @@ async def _build_user_content(text: str, media_items: list) -> str | list:
 
     blocks = []
 
-    # Process each media attachment
-    for item in media_items:
-        media_blocks = await process_inbound_media(
-            item["url"], item["content_type"], text
-        )
+    # Process all media attachments concurrently (results keep input order)
+    results = await asyncio.gather(
+        *(process_inbound_media(item["url"], item["content_type"], text) for item in media_items),
+        return_exceptions=True,
+    )
+    for item, media_blocks in zip(media_items, results):
+        if isinstance(media_blocks, Exception):
+            log.warning("[MEDIA] Failed to process %s attachment: %s", item["content_type"], media_blocks)
+            blocks.append({
+                "type": "text",
+                "text": f"[Media attachment ({item['content_type']}) could not be processed]",
+            })
+            continue
         blocks.extend(media_blocks)
 
     # Add the text message (may be empty for media-only messages)
@@ -235,111 +401,130 @@ async def _build_user_content(text: str, media_items: list) -> str | list:
 # ── Claude conversation loop ─────────────────────────────────────
 
 async def _process(from_number: str, text: str, media_items: list | None = None) -> None:
-    import sys
-    print(f"[PROCESS] Starting for {from_number}: {text[:60]}", flush=True)
-    conv = conversations.get_or_create(from_number)
-    print(f"[PROCESS] Conversation ID: {conv.id}, busy keys: {list(_busy.keys())}", flush=True)
-
-    if conv.id in _busy:
-        print(f"[PROCESS] BLOCKED - conv {conv.id} is busy, sending wait message", flush=True)
-        whatsapp.send_message(from_number, "Please wait for the previous request to finish...")
-        return
+    log.debug("[PROCESS] Starting for %s: %s", from_number, text[:60])
+    # ConversationManager calls commit synchronously; keep them off the loop
+    conv = await asyncio.to_thread(conversations.get_or_create, from_number)
+    log.debug("[PROCESS] Conversation ID: %s", conv.id)
+
+    lock = _conv_locks.setdefault(conv.id, asyncio.Lock())
+    if lock.locked():
+        log.info("[PROCESS] QUEUED - conv %s is busy", conv.id)
+        await whatsapp.send_message_async(
+            from_number, "Got it - I'll get to this as soon as I finish the current request."
+        )
 
-    _busy[conv.id] = True
+    await lock.acquire()
     try:
         # Build user content blocks (text + any media)
         user_content = await _build_user_content(text, media_items or [])
 
         # store user message
-        conversations.add_message(conv.id, "user", user_content)
-        messages = conversations.get_messages(conv.id)
-        print(f"[PROCESS] Sending {len(messages)} messages to Claude...", flush=True)
+        await asyncio.to_thread(conversations.add_message, conv.id, "user", user_content)
+        messages = await asyncio.to_thread(conversations.get_messages, conv.id)
+        log.debug("[PROCESS] Sending %d messages to Claude...", len(messages))
 
         turns = 0
         ack_sent = False  # only send "working on it" once
         while turns < MAX_TOOL_TURNS:
             turns += 1
-            print(f"[PROCESS] Turn {turns}...", flush=True)
-            response = await asyncio.to_thread(claude.send, messages)
-            print(f"[PROCESS] Claude response: stop_reason={response.stop_reason}", flush=True)
+            log.debug("[PROCESS] Turn %d...", turns)
+            response = await asyncio.get_running_loop().run_in_executor(
+                _claude_executor, claude.send, messages
+            )
+            log.info("[PROCESS] Claude response: stop_reason=%s", response.stop_reason)
+
+            # single pass over the response: API dicts, reply text, tool calls
+            dumped = []
+            reply_parts = []
+            tool_uses = []
+            for b in response.content:
+                dumped.append(_block_dict(b))
+                if b.type == "text":
+                    reply_parts.append(b.text)
+                elif b.type == "tool_use":
+                    tool_uses.append(b)
 
             if response.stop_reason == "end_turn":
                 # extract text and send it
-                reply = "".join(
-                    b.text for b in response.content if b.type == "text"
-                )
+                reply = "".join(reply_parts)
                 if reply:
-                    conversations.add_assistant_blocks(conv.id, response.content)
-                    whatsapp.send_message(from_number, reply)
+                    await asyncio.to_thread(conversations.add_assistant_blocks, conv.id, dumped)
+                    await whatsapp.send_message_async(from_number, reply)
                 break
 
             if response.stop_reason == "tool_use":
                 # Send a quick acknowledgment on the first tool call
                 if not ack_sent:
                     ack_sent = True
-                    whatsapp.send_message(
+                    await whatsapp.send_message_async(
                         from_number,
                         "On it Jay - give me a minute to work through that..."
                     )
 
-                # persist assistant message FIRST (before tool results)
-                conversations.add_assistant_blocks(conv.id, response.content)
+                # run the tool-use blocks concurrently; results keep their order
+                results = await asyncio.gather(
+                    *(_run_tool(conv.id, from_number, block) for block in tool_uses)
+                )
 
-                # process each tool-use block
+                # the assistant message goes in ahead of its tool results
+                turn_rows = [{"role": "assistant", "content": dumped}]
                 tool_results = []
-                for block in response.content:
-                    if block.type != "tool_use":
-                        continue
-
-                    name = block.name
-                    inputs = block.input
+                for block, result in zip(tool_uses, results):
                     tid = block.id
-
-                    if claude.check_approval(name, inputs):
-                        approved = await _request_approval(
-                            conv.id, from_number, name, inputs
-                        )
-                        if approved:
-                            result = await claude.execute_tool(name, inputs)
-                        else:
-                            result = "Denied by user."
-                    else:
-                        result = await claude.execute_tool(name, inputs)
-
-                    # ── Check for media send marker ──
-                    result = _handle_media_send(from_number, result)
-
-                    # persist tool result
-                    conversations.add_message(
-                        conv.id, "tool_result", result,
-                        tool_use_id=tid, tool_name=name,
-                    )
+                    turn_rows.append({
+                        "role": "tool_result", "content": result,
+                        "tool_use_id": tid, "tool_name": block.name,
+                    })
                     tool_results.append(
                         {"type": "tool_result", "tool_use_id": tid, "content": result}
                     )
 
+                # persist the whole turn in one transaction
+                await asyncio.to_thread(conversations.add_messages, conv.id, turn_rows)
+
                 # append to in-memory messages and loop
-                messages.append({"role": "assistant", "content": [_block_dict(b) for b in response.content]})
-                messages.append({"role": "user", "content": tool_results})
+                messages.extend((
+                    {"role": "assistant", "content": dumped},
+                    {"role": "user", "content": tool_results},
+                ))
                 continue
 
             # unexpected stop reason
-            whatsapp.send_message(
+            await whatsapp.send_message_async(
                 from_number, f"Unexpected stop reason: {response.stop_reason}"
             )
             break
 
         if turns >= MAX_TOOL_TURNS:
-            whatsapp.send_message(from_number, "Reached max tool turns. Please try a simpler request.")
+            await whatsapp.send_message_async(from_number, "Reached max tool turns. Please try a simpler request.")
 
     except Exception as exc:
-        import traceback
-        print(f"[ERROR] {exc}", flush=True)
-        traceback.print_exc()
-        whatsapp.send_message(from_number, f"Something went wrong: {exc}")
+        log.exception("[ERROR] %s", exc)
+        await whatsapp.send_message_async(from_number, f"Something went wrong: {exc}")
     finally:
-        print(f"[PROCESS] Done, releasing busy lock for conv {conv.id}", flush=True)
-        _busy.pop(conv.id, None)
+        log.debug("[PROCESS] Done, releasing lock for conv %s", conv.id)
+        lock.release()
+
+
+async def _run_tool(conv_id: int, from_number: str, block) -> str:
+    """Execute one tool_use block, asking for approval first if needed."""
+    name = block.name
+    inputs = block.input
+
+    # Tools that can need approval change state (e.g. write a script, then
+    # run it), so they run one at a time in the order Claude issued them.
+    # Read-only tools only share the concurrency cap.
+    gate = _side_effect_lock if claude.requires_approval(name) else contextlib.nullcontext()
+    async with gate:
+        if claude.check_approval(name, inputs):
+            approved = await _request_approval(conv_id, from_number, name, inputs)
+            if not approved:
+                return "Denied by user."
+        async with _tool_sem:
+            result = await claude.execute_tool(name, inputs)
+
+    # ── Check for media send marker ──
+    return await _handle_media_send(from_number, result)
 
 
 # ── Approval flow ────────────────────────────────────────────────
@@ -349,6 +534,8 @@ async def _request_approval(
 ) -> bool:
     aid = str(uuid.uuid4())[:8].upper()
     expires = datetime.utcnow() + timedelta(seconds=settings.approval_timeout_seconds)
+    # encoded once, for the description and the stored record
+    raw_input = orjson.dumps(tool_input)
 
     # friendly description
     if tool_name == "execute_bash":
@@ -356,76 +543,121 @@ async def _request_approval(
     elif tool_name == "write_file":
         desc = f"Write file:\n{tool_input.get('file_path', '?')} ({len(tool_input.get('content', ''))} chars)"
     else:
-        desc = f"Tool: {tool_name}\n{json.dumps(tool_input)[:200]}"
+        desc = f"Tool: {tool_name}\n{raw_input[:200].decode(errors='replace')}"
+
+    waiter = asyncio.get_running_loop().create_future()
+    _approval_waiters[aid] = waiter
 
+    await asyncio.to_thread(
+        _insert_approval, aid, conv_id, tool_name, raw_input, desc, expires
+    )
+
+    await whatsapp.send_approval_request_async(phone, desc, aid)
+
+    # wait for _handle_approval to signal a response
+    try:
+        status = await asyncio.wait_for(waiter, timeout=settings.approval_timeout_seconds)
+    except asyncio.TimeoutError:
+        status = await asyncio.to_thread(_expire_approval, aid)
+    finally:
+        _approval_waiters.pop(aid, None)
+
+    if status is not None:
+        return status == "approved"
+
+    await whatsapp.send_message_async(phone, f"Approval {aid} expired.")
+    return False
+
+
+def _insert_approval(
+    aid: str, conv_id: int, tool_name: str, raw_input: bytes, desc: str, expires: datetime
+) -> None:
+    stmt = insert(PendingApproval).values(
+        approval_id=aid,
+        conversation_id=conv_id,
+        tool_name=tool_name,
+        tool_input=_approval_input_record(raw_input),
+        description=desc,
+        created_at=datetime.utcnow(),
+        expires_at=expires,
+        status="pending",
+    )
     with Session(engine) as session:
-        session.add(
-            PendingApproval(
-                approval_id=aid,
-                conversation_id=conv_id,
-                tool_name=tool_name,
-                tool_input=json.dumps(tool_input),
-                description=desc,
-                expires_at=expires,
-            )
-        )
+        session.execute(stmt)
         session.commit()
 
-    whatsapp.send_approval_request(phone, desc, aid)
 
-    # poll for response
-    start = datetime.utcnow()
-    while (datetime.utcnow() - start).total_seconds() < settings.approval_timeout_seconds:
-        with Session(engine) as session:
-            row = session.exec(
-                select(PendingApproval).where(PendingApproval.approval_id == aid)
-            ).first()
-            if row and row.status != "pending":
-                return row.status == "approved"
-        await asyncio.sleep(2)
+def _approval_input_record(raw_input: bytes) -> str:
+    """The tool input's JSON, truncated past _APPROVAL_INPUT_MAX bytes.
+
+    A truncated record ends with the omitted length and a SHA-256 prefix of
+    the full JSON, so large write_file payloads aren't copied into SQLite.
+    """
+    if len(raw_input) <= _APPROVAL_INPUT_MAX:
+        return raw_input.decode()
+    digest = hashlib.sha256(raw_input).hexdigest()[:16]
+    head = raw_input[:_APPROVAL_INPUT_MAX].decode(errors="ignore")
+    return f"{head}...<+{len(raw_input) - _APPROVAL_INPUT_MAX} bytes sha256={digest}>"
+
+
+def _expire_approval(aid: str) -> str | None:
+    """Mark a timed-out approval expired.
 
-    # timed out
+    Returns None if it was still pending, otherwise the status a response
+    that raced in with the timeout wrote.
+    """
     with Session(engine) as session:
-        row = session.exec(
-            select(PendingApproval).where(PendingApproval.approval_id == aid)
+        expired = session.execute(
+            update(PendingApproval)
+            .where(
+                PendingApproval.approval_id == aid,
+                PendingApproval.status == "pending",
+            )
+            .values(status="expired")
+            .returning(PendingApproval.approval_id)
+        ).first()
+        session.commit()
+        if expired:
+            return None
+        return session.exec(
+            select(PendingApproval.status).where(PendingApproval.approval_id == aid)
         ).first()
-        if row:
-            row.status = "expired"
-            session.add(row)
-            session.commit()
-
-    whatsapp.send_message(phone, f"Approval {aid} expired.")
-    return False
 
 
 # ── Outbound media ────────────────────────────────────────────────
 
-def _handle_media_send(to_number: str, tool_result: str) -> str:
+async def _handle_media_send(to_number: str, tool_result: str) -> str:
     """Intercept the send_whatsapp_media tool's JSON marker and actually send media.
 
     If the result is a media-send marker, we send the media via WhatsApp
     and return a confirmation string for Claude's context.
     Otherwise, the result passes through unchanged.
     """
+    # cheap screen first: results can be hundreds of KB of bash output
+    if not (
+        isinstance(tool_result, str)
+        and tool_result[:1] == "{"
+        and '"__media_send__"' in tool_result
+    ):
+        return tool_result
     try:
-        data = json.loads(tool_result)
+        data = orjson.loads(tool_result)
         if isinstance(data, dict) and data.get("__media_send__"):
             media_url = data["media_url"]
             caption = data.get("caption", "")
-            print(f"[MEDIA OUT] Sending media to {to_number}: {media_url[:80]}", flush=True)
-            sid = whatsapp.send_media(to_number, media_url, caption or None)
+            log.info("[MEDIA OUT] Sending media to %s: %s", to_number, media_url[:80])
+            sid = await whatsapp.send_media_async(to_number, media_url, caption or None)
             return f"Media sent successfully to user. SID: {sid}"
-    except (json.JSONDecodeError, TypeError, KeyError):
+    except (orjson.JSONDecodeError, TypeError, KeyError):
         pass
     return tool_result
 
 
 # ── Helpers ──────────────────────────────────────────────────────
 
-def _block_dict(block) -> dict:
-    if hasattr(block, "model_dump"):
-        return block.model_dump()
-    return block if isinstance(block, dict) else {"type": "text", "text": str(block)}
+# Same conversion as the conversation manager, sharing its per-type
+# converter table instead of re-running hasattr() on every block
+_block_dict = ConversationManager._block_to_dict
 
 
 # ── Entrypoint ───────────────────────────────────────────────────
@@ -446,10 +678,16 @@ def main():
     print("Expose with:  ngrok http", settings.server_port)
     print()
 
+    # A single process: approvals, the per-conversation busy guard, the
+    # history cache, webhook dedupe and the MCP servers all live in memory.
+    # loop/http "auto" pick uvloop and httptools (from uvicorn[standard])
+    # where available, falling back to asyncio/h11 elsewhere (e.g. Windows).
     uvicorn.run(
         app,
         host=settings.server_host,
         port=settings.server_port,
+        loop="auto",
+        http="auto",
         log_level="info",
     )
 
@@ -5,15 +5,21 @@ Twilio serves media at URLs that require HTTP Basic auth
 (account SID + auth token).
 """
 
-import base64
+import binascii
+import logging
+import os
 import tempfile
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+import anthropic
 import httpx
 
+from .claude_client import FILES_API_BETA
 from .config import settings
 
+log = logging.getLogger(__name__)
+
 # Media types Claude can handle natively as image content blocks
 _IMAGE_TYPES = {
     "image/jpeg", "image/png", "image/gif", "image/webp",
@@ -33,6 +39,10 @@ _VIDEO_TYPES = {
 # Max image size to send to Claude (5 MB base64 ≈ 3.75 MB raw)
 _MAX_IMAGE_BYTES = 5 * 1024 * 1024
 
+# With CLAUDE_IMAGE_UPLOADS, smaller images stay inline: an upload round
+# trip costs more than the few KB of base64 it would save
+_UPLOAD_MIN_BYTES = 64 * 1024
+
 # Directory for persisting inbound media (survives across tool calls)
 _MEDIA_DIR = Path(tempfile.gettempdir()) / "whatsapp_media"
 _MEDIA_DIR.mkdir(exist_ok=True)
@@ -50,28 +60,62 @@ _EXT_MAP = {
 def _save_media(data: bytes, content_type: str) -> str:
     """Save media bytes to a persistent temp file. Returns the file path."""
     import time
+    import uuid
     ct = content_type.lower().split(";")[0].strip()
     ext = _EXT_MAP.get(ct, ".bin")
-    filename = f"wa_media_{int(time.time() * 1000)}{ext}"
+    # random suffix: attachments are processed concurrently, often in the same ms
+    filename = f"wa_media_{int(time.time() * 1000)}_{uuid.uuid4().hex[:8]}{ext}"
     path = _MEDIA_DIR / filename
     path.write_bytes(data)
-    print(f"[MEDIA] Saved to {path} ({len(data)} bytes)", flush=True)
+    log.info("[MEDIA] Saved to %s (%d bytes)", path, len(data))
     return str(path)
 
 
-def _twilio_auth() -> httpx.BasicAuth:
-    return httpx.BasicAuth(settings.twilio_account_sid, settings.twilio_auth_token)
+def _twilio_auth_header() -> str:
+    creds = f"{settings.twilio_account_sid}:{settings.twilio_auth_token}".encode()
+    return "Basic " + binascii.b2a_base64(creds, newline=False).decode("ascii")
+
+
+# Shared across downloads so connections to Twilio's media host stay open
+_client: Optional[httpx.AsyncClient] = None
+
+# Files API client, created on the first image upload
+_anthropic: Optional[anthropic.AsyncAnthropic] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        # a default header rather than auth=: encoded once, no per-request
+        # auth flow, and httpx still drops it on the redirect to the CDN
+        _client = httpx.AsyncClient(
+            headers={"Authorization": _twilio_auth_header()},
+            follow_redirects=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared HTTP clients (called on app shutdown)."""
+    global _client, _anthropic
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    if _anthropic is not None:
+        await _anthropic.close()
+        _anthropic = None
 
 
 async def download_media(url: str, content_type: str) -> Optional[bytes]:
     """Download media bytes from a Twilio media URL."""
     try:
-        async with httpx.AsyncClient(auth=_twilio_auth(), follow_redirects=True) as client:
-            resp = await client.get(url, timeout=30.0)
-            resp.raise_for_status()
-            return resp.content
+        resp = await _get_client().get(url)
+        resp.raise_for_status()
+        return resp.content
     except Exception as e:
-        print(f"[MEDIA] Failed to download {url}: {e}", flush=True)
+        log.warning("[MEDIA] Failed to download %s: %s", url, e)
         return None
 
 
@@ -89,8 +133,11 @@ def classify_media(content_type: str) -> str:
 
 def build_image_block(data: bytes, content_type: str) -> Optional[Dict[str, Any]]:
     """Build a Claude API image content block from raw bytes."""
-    if len(data) > _MAX_IMAGE_BYTES:
-        print(f"[MEDIA] Image too large ({len(data)} bytes), skipping", flush=True)
+    # The limit applies to the encoded payload; check its exact size before
+    # allocating it
+    b64_len = (len(data) + 2) // 3 * 4
+    if b64_len > _MAX_IMAGE_BYTES:
+        log.warning("[MEDIA] Image too large (%d bytes, %d base64), skipping", len(data), b64_len)
         return None
 
     # Normalise content type for Claude (strip params)
@@ -98,7 +145,7 @@ def build_image_block(data: bytes, content_type: str) -> Optional[Dict[str, Any]
     if media_type not in _IMAGE_TYPES:
         media_type = "image/jpeg"  # fallback
 
-    b64 = base64.standard_b64encode(data).decode("ascii")
+    b64 = binascii.b2a_base64(data, newline=False).decode("ascii")
     return {
         "type": "image",
         "source": {
@@ -109,39 +156,74 @@ def build_image_block(data: bytes, content_type: str) -> Optional[Dict[str, Any]
     }
 
 
-async def extract_video_frame(data: bytes, content_type: str) -> Optional[bytes]:
+async def image_block(data: bytes, content_type: str) -> Optional[Dict[str, Any]]:
+    """Build an image content block, uploading the image when configured.
+
+    With CLAUDE_IMAGE_UPLOADS the block references a Files API upload, so
+    the image isn't re-sent as base64 on every later turn. Falls back to an
+    inline base64 block if the upload fails.
+    """
+    if not settings.claude_image_uploads or len(data) < _UPLOAD_MIN_BYTES:
+        return build_image_block(data, content_type)
+    if (len(data) + 2) // 3 * 4 > _MAX_IMAGE_BYTES:
+        # same limit as inline images
+        return build_image_block(data, content_type)
+
+    global _anthropic
+    if _anthropic is None:
+        _anthropic = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+
+    media_type = content_type.lower().split(";")[0].strip()
+    if media_type not in _IMAGE_TYPES:
+        media_type = "image/jpeg"  # fallback
+
+    try:
+        uploaded = await _anthropic.beta.files.upload(
+            file=(f"whatsapp{_EXT_MAP.get(media_type, '.jpg')}", data, media_type),
+            betas=[FILES_API_BETA],
+        )
+    except Exception as e:
+        log.warning("[MEDIA] Image upload failed, sending inline: %s", e)
+        return build_image_block(data, content_type)
+
+    log.debug("[MEDIA] Uploaded image as %s", uploaded.id)
+    return {
+        "type": "image",
+        "source": {"type": "file", "file_id": uploaded.id},
+    }
+
+
+async def extract_video_frame(
+    data: bytes, content_type: str, path: Optional[str] = None
+) -> Optional[bytes]:
     """Extract the first frame of a video as JPEG using ffmpeg.
 
+    The frame is read from ffmpeg's stdout. Input comes from ``path`` when
+    the media is already on disk (MP4s often need a seekable input because
+    the moov atom sits at the end), otherwise ``data`` is piped via stdin.
+
     Returns JPEG bytes or None if ffmpeg is unavailable.
     """
     import asyncio
 
-    suffix = ".mp4" if "mp4" in content_type else ".3gp"
-    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp_in:
-        tmp_in.write(data)
-        tmp_in_path = tmp_in.name
-
-    tmp_out_path = tmp_in_path + "_frame.jpg"
-
+    src = path or "pipe:0"
     try:
         proc = await asyncio.create_subprocess_exec(
-            "ffmpeg", "-y", "-i", tmp_in_path,
-            "-vframes", "1", "-q:v", "2", tmp_out_path,
-            stdout=asyncio.subprocess.DEVNULL,
+            "ffmpeg", "-i", src,
+            "-vframes", "1", "-q:v", "2", "-f", "mjpeg", "pipe:1",
+            stdin=asyncio.subprocess.DEVNULL if path else asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.DEVNULL,
         )
-        await proc.wait()
+        frame, _ = await proc.communicate(None if path else data)
 
-        if proc.returncode == 0 and Path(tmp_out_path).exists():
-            return Path(tmp_out_path).read_bytes()
-        print("[MEDIA] ffmpeg frame extraction failed", flush=True)
+        if proc.returncode == 0 and frame:
+            return frame
+        log.warning("[MEDIA] ffmpeg frame extraction failed")
         return None
     except FileNotFoundError:
-        print("[MEDIA] ffmpeg not found - cannot extract video frame", flush=True)
+        log.warning("[MEDIA] ffmpeg not found - cannot extract video frame")
         return None
-    finally:
-        Path(tmp_in_path).unlink(missing_ok=True)
-        Path(tmp_out_path).unlink(missing_ok=True)
 
 
 async def transcribe_audio(data: bytes, content_type: str) -> Optional[str]:
@@ -151,9 +233,9 @@ async def transcribe_audio(data: bytes, content_type: str) -> Optional[str]:
     """
     # Save to a temp file so the MCP tool can read it
     suffix = ".ogg" if "ogg" in content_type else ".mp4" if "mp4" in content_type else ".amr"
-    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False, dir=tempfile.gettempdir()) as tmp:
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(fd, "wb") as tmp:
         tmp.write(data)
-        tmp_path = tmp.name
 
     try:
         from .tools.mcp_tool import MCPBridgeTool
@@ -170,10 +252,10 @@ async def transcribe_audio(data: bytes, content_type: str) -> Optional[str]:
         )
         if result and not result.startswith("Error"):
             return result
-        print(f"[MEDIA] ElevenLabs transcription returned: {result[:200] if result else 'None'}", flush=True)
+        log.warning("[MEDIA] ElevenLabs transcription returned: %s", result[:200] if result else "None")
         return None
     except Exception as e:
-        print(f"[MEDIA] Transcription failed: {e}", flush=True)
+        log.warning("[MEDIA] Transcription failed: %s", e)
         return None
     finally:
         Path(tmp_path).unlink(missing_ok=True)
@@ -189,7 +271,7 @@ async def process_inbound_media(
     """
     content_blocks: List[Dict[str, Any]] = []
     kind = classify_media(content_type)
-    print(f"[MEDIA] Processing {kind} ({content_type}) from {media_url[:80]}...", flush=True)
+    log.info("[MEDIA] Processing %s (%s) from %s...", kind, content_type, media_url[:80])
 
     data = await download_media(media_url, content_type)
     if data is None:
@@ -199,13 +281,13 @@ async def process_inbound_media(
         })
         return content_blocks
 
-    print(f"[MEDIA] Downloaded {len(data)} bytes", flush=True)
+    log.debug("[MEDIA] Downloaded %d bytes", len(data))
 
     # Save to disk so Claude can reference the file (e.g. for Drive upload)
     saved_path = _save_media(data, content_type)
 
     if kind == "image":
-        img_block = build_image_block(data, content_type)
+        img_block = await image_block(data, content_type)
         if img_block:
             content_blocks.append(img_block)
             content_blocks.append({
@@ -220,9 +302,9 @@ async def process_inbound_media(
 
     elif kind == "video":
         # Extract a frame for Claude to see
-        frame = await extract_video_frame(data, content_type)
+        frame = await extract_video_frame(data, content_type, saved_path)
         if frame:
-            img_block = build_image_block(frame, "image/jpeg")
+            img_block = await image_block(frame, "image/jpeg")
             if img_block:
                 content_blocks.append(img_block)
                 content_blocks.append({
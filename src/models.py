@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, Index, SQLModel
 
 
 class Conversation(SQLModel, table=True):
@@ -16,6 +16,11 @@ class Conversation(SQLModel, table=True):
 class Message(SQLModel, table=True):
     """A single message inside a conversation."""
 
+    # Serves "latest N messages of a conversation" straight from the index
+    __table_args__ = (
+        Index("ix_message_conversation_created", "conversation_id", "created_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     conversation_id: int = Field(foreign_key="conversation.id", index=True)
     role: str  # "user", "assistant", "tool_use", "tool_result"
@@ -28,11 +33,16 @@ class Message(SQLModel, table=True):
 class PendingApproval(SQLModel, table=True):
     """An approval request waiting for user response."""
 
+    # "pending rows" and "pending rows past their deadline" scans
+    __table_args__ = (
+        Index("ix_pending_approval_status_exp", "status", "expires_at"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     approval_id: str = Field(unique=True, index=True)
     conversation_id: int = Field(foreign_key="conversation.id")
     tool_name: str
-    tool_input: str  # JSON string
+    tool_input: str  # JSON string, truncated beyond 4 KB
     description: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
     expires_at: datetime
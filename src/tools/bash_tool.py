@@ -1,27 +1,41 @@
+import asyncio
+import contextlib
+import logging
 import re
-import subprocess
 from typing import Any, Dict
 
 from .base import BaseTool
 
-# Patterns that indicate a destructive / dangerous command.
+log = logging.getLogger(__name__)
+
+# Single-word commands that indicate a destructive / dangerous command.
+# Matched as whole words anywhere in the command (so "dir && del x" counts)
+# with one set lookup per word instead of a regex branch per keyword.
 # Everything else (reads, searches, navigation, dates, etc.) is auto-approved.
+_DESTRUCTIVE_WORDS = frozenset({
+    "rm", "rmdir", "del", "erase",                # delete files/dirs
+    "format",                                     # disk format
+    "kill", "taskkill",                           # kill processes
+    "shutdown",                                   # system power
+    "mklink",                                     # symlinks
+    "attrib",                                     # change file attributes
+    "icacls", "cacls",                            # permission changes
+    "move", "ren", "rename",                      # move / rename
+})
+
+_WORD = re.compile(r"\w+")
+
+# Multi-word and hyphenated patterns the word set can't express.
 _DESTRUCTIVE_PATTERNS = re.compile(
     r"""(?ix)                     # case-insensitive, verbose
     \b(?:
-        rm\b | rmdir\b | del\b | erase\b         # delete files/dirs
-      | remove-item\b                              # powershell delete
-      | format\b                                   # disk format
-      | kill\b | stop-process\b | taskkill\b       # kill processes
-      | shutdown\b | restart-computer\b            # system power
+        remove-item\b                              # powershell delete
+      | stop-process\b                             # kill processes
+      | restart-computer\b                         # system power
       | net\s+(?:user|localgroup)\b                # user management
       | reg\s+(?:delete|add)\b                     # registry edits
       | sc\s+(?:delete|stop)\b                     # service management
-      | mklink\b                                   # symlinks
-      | attrib\b                                   # change file attributes
-      | icacls\b | cacls\b                         # permission changes
       | schtasks\s+/(?:create|delete)\b            # scheduled tasks
-      | move\b | ren\b | rename\b                  # move / rename
       | curl\b.*-[dX]                              # HTTP POST/PUT/DELETE via curl
       | invoke-webrequest\b.*-method\b             # powershell HTTP mutations
       | pip\s+install\b | pip\s+uninstall\b        # package install/remove
@@ -32,6 +46,34 @@ _DESTRUCTIVE_PATTERNS = re.compile(
 )
 
 
+# Per-stream cap on what goes back to Claude (and into the history)
+MAX_OUTPUT_CHARS = 10_000
+
+
+def _decode(output: bytes) -> str:
+    """Decode captured output as text mode would (UTF-8, universal newlines)."""
+    text = output.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def _clip(output: str) -> str:
+    """Trim and truncate one captured stream, slicing before any copy."""
+    if len(output) > MAX_OUTPUT_CHARS:
+        return (
+            output[:MAX_OUTPUT_CHARS].strip()
+            + f"\n\n... (truncated, {len(output)} chars total)"
+        )
+    return output.strip()
+
+
+def _is_destructive(command: str) -> bool:
+    if not _DESTRUCTIVE_WORDS.isdisjoint(_WORD.findall(command.lower())):
+        return True
+    return _DESTRUCTIVE_PATTERNS.search(command) is not None
+
+
 class BashTool(BaseTool):
     """Execute shell commands on the local Windows machine."""
 
@@ -43,7 +85,8 @@ class BashTool(BaseTool):
     def description(self) -> str:
         return (
             "Execute a shell command on the local Windows system. "
-            "Output (stdout + stderr) is captured and returned. "
+            "Output (stdout + stderr) is captured and returned, each truncated "
+            "to 10 000 characters. "
             "Commands time out after 30 seconds. "
             "Read-only commands (dir, type, cat, date, echo, grep, find, where, cd, ls, "
             "pwd, whoami, hostname, etc.) are auto-approved. "
@@ -76,32 +119,37 @@ class BashTool(BaseTool):
     def check_approval(self, **kwargs) -> bool:
         """Only require approval for destructive commands."""
         command = kwargs.get("command", "")
-        is_destructive = bool(_DESTRUCTIVE_PATTERNS.search(command))
+        is_destructive = _is_destructive(command)
         if not is_destructive:
-            print(f"[BASH] Auto-approved (read-only): {command[:80]}", flush=True)
+            log.info("[BASH] Auto-approved (read-only): %s", command[:80])
         else:
-            print(f"[BASH] Requires approval (destructive): {command[:80]}", flush=True)
+            log.info("[BASH] Requires approval (destructive): %s", command[:80])
         return is_destructive
 
     async def execute(self, command: str, reason: str = "") -> str:
+        # asyncio subprocess, so a 30 s command doesn't stall the event loop
         try:
-            result = subprocess.run(
+            proc = await asyncio.create_subprocess_shell(
                 command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30,
-                encoding="utf-8",
-                errors="replace",
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
             )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30)
+            except asyncio.TimeoutError:
+                # kill the shell and reap it, but only briefly: a background
+                # child it started can hold the pipes open long after
+                proc.kill()
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(proc.wait(), 1)
+                return "Error: Command timed out after 30 seconds"
             parts = []
-            if result.stdout:
-                parts.append(f"STDOUT:\n{result.stdout.strip()}")
-            if result.stderr:
-                parts.append(f"STDERR:\n{result.stderr.strip()}")
-            parts.append(f"Exit code: {result.returncode}")
+            if stdout:
+                parts.append(f"STDOUT:\n{_clip(_decode(stdout))}")
+            if stderr:
+                parts.append(f"STDERR:\n{_clip(_decode(stderr))}")
+            parts.append(f"Exit code: {proc.returncode}")
             return "\n\n".join(parts)
-        except subprocess.TimeoutExpired:
-            return "Error: Command timed out after 30 seconds"
         except Exception as e:
             return f"Error: {e}"
@@ -1,9 +1,19 @@
+import io
+import os
+import stat
 from pathlib import Path
 from typing import Any, Dict
 
 from .base import BaseTool
 
 MAX_READ_CHARS = 10_000
+# Leading bytes checked for NULs to spot binary files
+_SNIFF_BYTES = 512
+
+# O_NONBLOCK so opening a FIFO with no writer returns at once instead of
+# hanging the event loop; regular files ignore it
+_READ_FLAGS = os.O_RDONLY | getattr(os, "O_NONBLOCK", 0) | getattr(os, "O_BINARY", 0)
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
 
 
 class FileReadTool(BaseTool):
@@ -34,22 +44,43 @@ class FileReadTool(BaseTool):
         }
 
     async def execute(self, file_path: str) -> str:
+        # open straight away rather than stat()ing first; the errors say why
         try:
-            p = Path(file_path)
-            if not p.exists():
-                return f"Error: File not found: {file_path}"
-            if not p.is_file():
+            fd = os.open(file_path, _READ_FLAGS)
+            st = os.fstat(fd)
+            # FIFOs, ttys, devices and (on POSIX) directories open fine but
+            # would block or make no sense to read
+            if not stat.S_ISREG(st.st_mode):
+                os.close(fd)
+                return f"Error: Not a file: {file_path}"
+            # read one char past the limit to learn whether to truncate; a
+            # huge log file is never loaded whole
+            with open(fd, "rb", buffering=65536) as raw:
+                # NUL bytes up front mean a binary file (sqlite, zip, exe):
+                # bail out before decoding it into replacement characters
+                if b"\0" in raw.peek(_SNIFF_BYTES)[:_SNIFF_BYTES]:
+                    return f"Error: Binary file (contains NUL bytes): {file_path}"
+                with io.TextIOWrapper(raw, encoding="utf-8", errors="replace") as f:
+                    content = f.read(MAX_READ_CHARS + 1)
+        except FileNotFoundError:
+            return f"Error: File not found: {file_path}"
+        except IsADirectoryError:
+            return f"Error: Not a file: {file_path}"
+        except PermissionError as e:
+            # Windows reports opening a directory as a permission error
+            if Path(file_path).is_dir():
                 return f"Error: Not a file: {file_path}"
-            content = p.read_text(encoding="utf-8", errors="replace")
-            if len(content) > MAX_READ_CHARS:
-                return (
-                    content[:MAX_READ_CHARS]
-                    + f"\n\n... (truncated, {len(content)} chars total)"
-                )
-            return content
+            return f"Error reading file: {e}"
         except Exception as e:
             return f"Error reading file: {e}"
 
+        if len(content) > MAX_READ_CHARS:
+            return (
+                content[:MAX_READ_CHARS]
+                + f"\n\n... (truncated, {st.st_size} bytes total)"
+            )
+        return content
+
 
 class FileWriteTool(BaseTool):
     """Write content to a file on the local filesystem."""
@@ -88,9 +119,22 @@ class FileWriteTool(BaseTool):
 
     async def execute(self, file_path: str, content: str) -> str:
         try:
-            p = Path(file_path)
-            p.parent.mkdir(parents=True, exist_ok=True)
-            p.write_text(content, encoding="utf-8")
+            parent = os.path.dirname(file_path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            # encode once and hand the bytes straight to the OS, translating
+            # newlines the way text mode (write_text) did
+            if os.linesep != "\n":
+                content_out = content.replace("\n", os.linesep)
+            else:
+                content_out = content
+            data = memoryview(content_out.encode("utf-8"))
+            fd = os.open(file_path, _WRITE_FLAGS, 0o666)
+            try:
+                while data:
+                    data = data[os.write(fd, data):]
+            finally:
+                os.close(fd)
             return f"Wrote {len(content)} characters to {file_path}"
         except Exception as e:
             return f"Error writing file: {e}"
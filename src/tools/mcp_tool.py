@@ -9,16 +9,30 @@ Architecture:
   - MCP servers are spawned ONCE and kept alive for the bridge's lifetime.
   - This mirrors how Claude Code manages MCP servers (persistent connections).
   - Auth sessions, cookies, and state are preserved across tool calls.
-  - Servers are lazily started on first use and restarted if they crash.
+  - Servers are prewarmed at startup (or started on first use) and
+    restarted if they crash.
+  - Requests are matched to responses by JSON-RPC id, so concurrent calls
+    to one server are pipelined rather than queued.
+  - A FastMCP server configured with "python_module" is imported and
+    called in-process instead of spawned.
 """
 
 import asyncio
-import json
+import importlib
+import logging
 import os
-from typing import Any, Dict, List, Optional
+import re
+import shutil
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Union
+
+import orjson
 
 from .base import BaseTool
 
+log = logging.getLogger(__name__)
+
 # ── Load MCP server configs from settings.json (single source of truth) ──────
 
 def _load_mcp_servers() -> Dict[str, Dict[str, Any]]:
@@ -26,30 +40,70 @@ def _load_mcp_servers() -> Dict[str, Dict[str, Any]]:
     from pathlib import Path
     settings_path = Path.home() / ".claude" / "settings.json"
     try:
-        with open(settings_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = orjson.loads(settings_path.read_bytes())
         servers = data.get("mcpServers", {})
         result = {}
         for name, cfg in servers.items():
+            command = cfg.get("command", "")
+            path = cfg.get("env", {}).get("PATH")  # the server's own PATH, if set
+            if not cfg.get("python_module") and not shutil.which(command, path=path):
+                # Don't advertise a server Claude can only time out on
+                log.warning("[MCP] Skipping '%s': command not found: %r", name, command)
+                continue
             result[name] = {
-                "command": cfg.get("command", ""),
+                "command": command,
                 "args": cfg.get("args", []),
                 "env": cfg.get("env", {}),
                 "description": cfg.get("description", f"{name} MCP server"),
+                "warmup_ms": cfg.get("warmup_ms", 0),
+                "python_module": cfg.get("python_module", ""),
             }
-        print(f"[MCP] Loaded {len(result)} servers from {settings_path}: {', '.join(result.keys())}", flush=True)
         return result
     except Exception as e:
-        print(f"[MCP] WARNING: Could not load settings.json: {e}", flush=True)
+        log.warning("[MCP] Could not load settings.json: %s", e)
         return {}
 
 
 MCP_SERVERS: Dict[str, Dict[str, Any]] = _load_mcp_servers()
 
+# StreamReader buffer limit for server stdout. Newline-delimited responses
+# arrive as one line, and asyncio's 64 KiB default makes readline() fail on
+# any larger result (a long email, a sheet dump).
+_STDOUT_LIMIT = 16 * 1024 * 1024
+
+# Seconds a server gets to exit after stdin closes before it is killed
+_SHUTDOWN_GRACE = 2
+
+# Longest tools/call output passed back to Claude (characters)
+_MAX_OUTPUT = 8000
+
+# Per-server limit for the startup prewarm (seconds)
+_PREWARM_TIMEOUT = 30
+
+# How long a server's formatted tools/list reply is reused (seconds)
+_TOOLS_TTL = 600
+
 
 # ── Persistent MCP server connections ────────────────────────────────────────
 
-class MCPConnection:
+class _ToolListCache:
+    """Keeps a server's formatted tools/list reply for _TOOLS_TTL seconds."""
+
+    tools_cache: Optional[str] = None
+    _tools_cached_at = 0.0
+
+    def cached_tools(self) -> Optional[str]:
+        """Return the cached tool listing if it is still fresh."""
+        if self.tools_cache is not None and time.monotonic() - self._tools_cached_at < _TOOLS_TTL:
+            return self.tools_cache
+        return None
+
+    def cache_tools(self, listing: str) -> None:
+        self.tools_cache = listing
+        self._tools_cached_at = time.monotonic()
+
+
+class MCPConnection(_ToolListCache):
     """A persistent connection to a single MCP server process."""
 
     def __init__(self, name: str, cfg: Dict[str, Any]):
@@ -59,6 +113,22 @@ class MCPConnection:
         self._lock = asyncio.Lock()
         self._request_id = 10  # Start above init IDs
         self._initialized = False
+        # Spawn environment, merged once and reused on every (re)start
+        self._env = {
+            **os.environ,
+            **cfg.get("env", {}),
+            "PYTHONIOENCODING": "utf-8",
+            "PYTHONUTF8": "1",
+            "NO_UPDATE_NOTIFIER": "1",
+        }
+        # Recent stderr chunks, read continuously by _pump_stderr so the
+        # server never blocks on a full pipe and errors can quote it at once
+        self._stderr_buf: Deque[bytes] = deque(maxlen=64)
+        self._stderr_task: Optional[asyncio.Task] = None
+        # In-flight requests by JSON-RPC id. _pump_stdout resolves them as
+        # responses arrive, so several calls can share the server at once.
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._stdout_task: Optional[asyncio.Task] = None
 
     async def ensure_running(self) -> None:
         """Start the server if not running, or restart if it crashed."""
@@ -78,18 +148,13 @@ class MCPConnection:
                 pass
             self.proc = None
             self._initialized = False
+        self._fail_pending(f"MCP server '{self.name}' was restarted")
+        self.tools_cache = None
 
         command = self.cfg["command"]
         args = self.cfg.get("args", [])
-        extra_env = self.cfg.get("env", {})
 
-        env = os.environ.copy()
-        env.update(extra_env)
-        env["PYTHONIOENCODING"] = "utf-8"
-        env["PYTHONUTF8"] = "1"
-        env["NO_UPDATE_NOTIFIER"] = "1"
-
-        print(f"[MCP:{self.name}] Starting: {command} {' '.join(args)}", flush=True)
+        log.info("[MCP:%s] Starting: %s %s", self.name, command, " ".join(args))
 
         self.proc = await asyncio.create_subprocess_exec(
             command,
@@ -97,20 +162,17 @@ class MCPConnection:
             stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
-            env=env,
+            env=self._env,
+            limit=_STDOUT_LIMIT,
         )
+        for task in (self._stdout_task, self._stderr_task):
+            if task is not None:
+                task.cancel()  # still reading the previous process
+        self._stderr_buf.clear()
+        self._stderr_task = asyncio.create_task(self._pump_stderr(self.proc.stderr))
 
         # Initialize
-        init_msg = _jsonrpc_message(
-            "initialize",
-            {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {},
-                "clientInfo": {"name": "whatsapp-bridge", "version": "0.2.0"},
-            },
-            id=1,
-        )
-        self.proc.stdin.write(init_msg)
+        self.proc.stdin.write(_INITIALIZE_MSG)
         await self.proc.stdin.drain()
 
         init_response = await asyncio.wait_for(
@@ -118,90 +180,200 @@ class MCPConnection:
         )
 
         if "error" in init_response:
-            stderr_out = await self._drain_stderr()
+            stderr_out = self._drain_stderr()
             raise RuntimeError(f"Init failed for {self.name}: {init_response['error']}. Stderr: {stderr_out}")
 
-        print(f"[MCP:{self.name}] Initialized OK", flush=True)
+        log.info("[MCP:%s] Initialized OK", self.name)
 
         # Send initialized notification
-        notif = _jsonrpc_message("notifications/initialized", {})
-        self.proc.stdin.write(notif)
+        self.proc.stdin.write(_INITIALIZED_MSG)
         await self.proc.stdin.drain()
-        await asyncio.sleep(0.2)
+        # the handshake is complete; only servers configured with a warmup
+        # get extra time before their first request
+        warmup_ms = self.cfg.get("warmup_ms", 0)
+        if warmup_ms:
+            await asyncio.sleep(warmup_ms / 1000)
 
+        self._stdout_task = asyncio.create_task(self._pump_stdout(self.proc))
         self._initialized = True
 
     async def send_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Send a JSON-RPC request to the running server."""
+        # The lock covers (re)starting and writing only; the response is
+        # awaited outside it, so concurrent calls are pipelined.
         async with self._lock:
             await self.ensure_running()
 
             self._request_id += 1
             rid = self._request_id
+            response = asyncio.get_running_loop().create_future()
+            self._pending[rid] = response
 
             request_msg = _jsonrpc_message(method, params, id=rid)
-            self.proc.stdin.write(request_msg)
-            await self.proc.stdin.drain()
+            try:
+                self.proc.stdin.write(request_msg)
+                await self.proc.stdin.drain()
+            except Exception:
+                self._pending.pop(rid, None)
+                raise
 
-            print(f"[MCP:{self.name}] Sent {method} (id={rid})", flush=True)
+        log.debug("[MCP:%s] Sent %s (id=%d)", self.name, method, rid)
 
-            try:
-                response = await asyncio.wait_for(
-                    _read_jsonrpc_response(self.proc.stdout), timeout=120
-                )
-                return response
-            except asyncio.TimeoutError:
-                stderr_out = await self._drain_stderr()
-                # Server might be stuck — kill and let it restart next time
-                self._initialized = False
+        try:
+            return await asyncio.wait_for(response, timeout=120)
+        except asyncio.TimeoutError:
+            self._pending.pop(rid, None)
+            stderr_out = self._drain_stderr()
+            # Server might be stuck — kill and let it restart next time
+            self._initialized = False
+            if self.proc is not None:
                 try:
                     self.proc.kill()
                 except ProcessLookupError:
                     pass
                 self.proc = None
-                return {"error": f"MCP server '{self.name}' timed out. Stderr: {stderr_out[:300]}"}
+            self._fail_pending(f"MCP server '{self.name}' was restarted after a timeout")
+            return {"error": f"MCP server '{self.name}' timed out. Stderr: {stderr_out[:300]}"}
 
-    async def _drain_stderr(self) -> str:
-        """Read available stderr."""
-        if self.proc is None or self.proc.stderr is None:
-            return ""
+    async def _pump_stdout(self, proc: asyncio.subprocess.Process) -> None:
+        """Route the server's responses to their waiting requests by id."""
+        stdout = proc.stdout
+        reason = f"MCP server '{self.name}' closed the connection"
         try:
-            data = await asyncio.wait_for(self.proc.stderr.read(16384), timeout=5)
-            result = data.decode("utf-8", errors="replace").strip()
-            if result:
-                print(f"[MCP:{self.name} STDERR] {result[:1000]}", flush=True)
-            return result
-        except (asyncio.TimeoutError, Exception):
-            return ""
+            while True:
+                msg = await _read_jsonrpc_response(stdout, notifications=True)
+                if msg.get("method") == "notifications/tools/list_changed":
+                    self.tools_cache = None
+                    continue
+                rid = msg.get("id")
+                if rid is None:
+                    # EOF, a notification, or a long run of junk output
+                    if stdout.at_eof():
+                        break
+                    continue
+                if "method" in msg:
+                    continue  # a request from the server; none are supported
+                waiter = self._pending.pop(rid, None)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(msg)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            reason = f"MCP server '{self.name}' sent an unreadable response: {e}"
+        # only if this is still the live process (not one being replaced)
+        if self.proc is proc:
+            self._initialized = False
+            self._fail_pending(reason)
+
+    def _fail_pending(self, reason: str) -> None:
+        """Answer every in-flight request with an error."""
+        for waiter in self._pending.values():
+            if not waiter.done():
+                waiter.set_result({"error": reason})
+        self._pending.clear()
+
+    async def _pump_stderr(self, stream: asyncio.StreamReader) -> None:
+        """Collect the server's stderr until it exits."""
+        while chunk := await stream.read(4096):
+            self._stderr_buf.append(chunk)
+
+    def _drain_stderr(self) -> str:
+        """Return (and clear) the stderr collected since the last call."""
+        result = b"".join(self._stderr_buf).decode("utf-8", errors="replace").strip()
+        self._stderr_buf.clear()
+        if result:
+            log.warning("[MCP:%s STDERR] %s", self.name, result[:1000])
+        return result
 
     async def shutdown(self) -> None:
         """Cleanly stop the server."""
         if self.proc is not None:
+            # EOF on stdin is the stdio transport's shutdown signal; give the
+            # server a moment to flush and exit before killing it
             try:
                 self.proc.stdin.close()
-                self.proc.kill()
-            except (ProcessLookupError, BrokenPipeError):
-                pass
+                await asyncio.wait_for(self.proc.wait(), timeout=_SHUTDOWN_GRACE)
+            except (asyncio.TimeoutError, BrokenPipeError, ConnectionResetError):
+                try:
+                    self.proc.kill()
+                except ProcessLookupError:
+                    pass
             self.proc = None
             self._initialized = False
-            print(f"[MCP:{self.name}] Shut down", flush=True)
+            log.info("[MCP:%s] Shut down", self.name)
+        for task in (self._stdout_task, self._stderr_task):
+            if task is not None:
+                task.cancel()
+        self._stdout_task = self._stderr_task = None
+        self._fail_pending(f"MCP server '{self.name}' was shut down")
+
+
+class InProcessMCP(_ToolListCache):
+    """A Python MCP server imported into the bridge and called directly.
+
+    Used when a server's config has ``"python_module": "package.module:app"``
+    naming a FastMCP instance. There is no subprocess or stdio framing; the
+    server's list_tools/call_tool coroutines run on the bridge's event loop
+    and their results are shaped like JSON-RPC responses for MCPBridgeTool.
+    """
+
+    def __init__(self, name: str, cfg: Dict[str, Any]):
+        self.name = name
+        self.cfg = cfg
+        self._app: Any = None
+
+    async def _get_app(self) -> Any:
+        if self._app is None:
+            module_name, _, attr = self.cfg["python_module"].partition(":")
+            module = await asyncio.to_thread(importlib.import_module, module_name)
+            self._app = getattr(module, attr or "mcp")
+            log.info("[MCP:%s] Loaded in-process from %s", self.name, self.cfg["python_module"])
+        return self._app
+
+    async def send_request(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        app = await self._get_app()
+        try:
+            if method == "tools/list":
+                tools = await app.list_tools()
+                return {"result": {"tools": [_as_json(t) for t in tools]}}
+            if method == "tools/call":
+                content = await app.call_tool(params["name"], params.get("arguments", {}))
+                if isinstance(content, tuple):
+                    content = content[0]  # newer FastMCP: (content, structured)
+                return {"result": {"content": [_as_json(c) for c in content]}}
+        except Exception as e:
+            return {"error": f"{type(e).__name__}: {e}"}
+        return {"error": f"Method '{method}' is not supported in-process"}
+
+    async def shutdown(self) -> None:
+        self._app = None
+
 
+def _as_json(obj: Any) -> Any:
+    """Plain-dict form of an MCP SDK model (Tool, TextContent, ...)."""
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", by_alias=True, exclude_none=True)
+    return obj
+
+
+MCPServer = Union[MCPConnection, InProcessMCP]
 
 # Global connection pool — one persistent connection per server
-_connections: Dict[str, MCPConnection] = {}
+_connections: Dict[str, MCPServer] = {}
 
 
-def _get_connection(server_name: str) -> MCPConnection:
+def _get_connection(server_name: str) -> MCPServer:
     """Get or create a persistent connection to a server."""
     if server_name not in _connections:
-        _connections[server_name] = MCPConnection(server_name, MCP_SERVERS[server_name])
+        cfg = MCP_SERVERS[server_name]
+        cls = InProcessMCP if cfg.get("python_module") else MCPConnection
+        _connections[server_name] = cls(server_name, cfg)
     return _connections[server_name]
 
 
 async def shutdown_all_mcp() -> None:
     """Shut down all persistent MCP connections. Called on bridge exit."""
-    for conn in _connections.values():
-        await conn.shutdown()
+    await asyncio.gather(*(conn.shutdown() for conn in _connections.values()))
     _connections.clear()
 
 
@@ -253,6 +425,10 @@ class MCPBridgeTool(BaseTool):
                     "type": "object",
                     "description": "Arguments to pass to the tool (required when action='call_tool')",
                 },
+                "refresh": {
+                    "type": "boolean",
+                    "description": "With action='list_tools', re-fetch instead of using the cached list",
+                },
             },
             "required": ["action", "server_name"],
         }
@@ -263,8 +439,9 @@ class MCPBridgeTool(BaseTool):
         server_name: str,
         tool_name: str = "",
         arguments: Optional[Dict[str, Any]] = None,
+        refresh: bool = False,
     ) -> str:
-        print(f"[MCP EXECUTE] action={action}, server={server_name}, tool={tool_name}", flush=True)
+        log.info("[MCP EXECUTE] action=%s, server=%s, tool=%s", action, server_name, tool_name)
         if server_name not in MCP_SERVERS:
             return f"Error: Unknown server '{server_name}'. Available: {', '.join(MCP_SERVERS.keys())}"
 
@@ -272,7 +449,7 @@ class MCPBridgeTool(BaseTool):
 
         try:
             if action == "list_tools":
-                return await self._list_tools(conn)
+                return await self._list_tools(conn, refresh)
             elif action == "call_tool":
                 if not tool_name:
                     return "Error: tool_name is required when action='call_tool'"
@@ -280,11 +457,16 @@ class MCPBridgeTool(BaseTool):
             else:
                 return f"Error: Unknown action '{action}'. Use 'list_tools' or 'call_tool'."
         except Exception as e:
-            print(f"[MCP:{server_name}] Error: {e}", flush=True)
+            log.warning("[MCP:%s] Error: %s", server_name, e)
             return f"MCP error: {e}"
 
-    async def _list_tools(self, conn: MCPConnection) -> str:
+    async def _list_tools(self, conn: MCPServer, refresh: bool = False) -> str:
         """List available tools from an MCP server."""
+        if not refresh:
+            cached = conn.cached_tools()
+            if cached is not None:
+                return cached
+
         result = await conn.send_request("tools/list", {})
         if "error" in result:
             return f"Error: {result['error']}"
@@ -301,10 +483,12 @@ class MCPBridgeTool(BaseTool):
                 desc = desc[:100] + "..."
             lines.append(f"- **{name}**: {desc}")
 
-        return f"Available tools ({len(tools)}):\n" + "\n".join(lines)
+        listing = f"Available tools ({len(tools)}):\n" + "\n".join(lines)
+        conn.cache_tools(listing)
+        return listing
 
     async def _call_tool(
-        self, conn: MCPConnection, tool_name: str, arguments: Dict[str, Any]
+        self, conn: MCPServer, tool_name: str, arguments: Dict[str, Any]
     ) -> str:
         """Call a specific tool on an MCP server."""
         result = await conn.send_request(
@@ -315,22 +499,62 @@ class MCPBridgeTool(BaseTool):
             return f"Error: {result['error']}"
 
         content = result.get("result", {}).get("content", [])
-        parts = []
-        for block in content:
-            if isinstance(block, dict):
-                text = block.get("text", "")
-                if text:
-                    parts.append(text)
-            elif isinstance(block, str):
-                parts.append(block)
+        output = _join_clipped(_text_parts(content), _MAX_OUTPUT)
+        if not output:
+            output = orjson.dumps(result.get("result", {}), option=orjson.OPT_INDENT_2).decode()
+            if len(output) > _MAX_OUTPUT:
+                output = output[:_MAX_OUTPUT] + "\n\n... (truncated)"
 
-        output = "\n".join(parts) if parts else json.dumps(result.get("result", {}), indent=2)
+        return output
 
-        # Truncate very long output
-        if len(output) > 8000:
-            output = output[:8000] + "\n\n... (truncated)"
 
-        return output
+def _text_parts(content: List[Any]) -> Iterator[str]:
+    """Yield the text of each MCP content block (dicts with "text", or strings)."""
+    for block in content:
+        if type(block) is dict:
+            text = block.get("text")
+            if text:
+                yield text
+        elif type(block) is str:
+            yield block
+
+
+async def prewarm_all_mcp() -> None:
+    """Start every configured server and cache its tool list.
+
+    Run once in the background at bridge startup so the first user-facing
+    call doesn't pay for process spawn and the handshake. A server that
+    fails or exceeds _PREWARM_TIMEOUT is left to start lazily on first use.
+    """
+    tool = MCPBridgeTool()
+
+    async def warm(name: str) -> None:
+        conn = _get_connection(name)
+        try:
+            result = await asyncio.wait_for(tool._list_tools(conn), timeout=_PREWARM_TIMEOUT)
+        except Exception as e:
+            log.warning("[MCP:%s] Prewarm failed, will start on first use: %s", name, e)
+            return
+        if result.startswith("Error:"):
+            log.warning("[MCP:%s] Prewarm failed, will start on first use: %s", name, result)
+
+    await asyncio.gather(*(warm(name) for name in MCP_SERVERS))
+
+
+def _join_clipped(parts: Iterator[str], limit: int) -> str:
+    """Newline-join parts, stopping once the result would exceed limit.
+
+    Blocks past the limit are never joined, so a huge multi-block result
+    costs no more than the part that is kept.
+    """
+    kept: List[str] = []
+    size = -1  # no separator before the first part
+    for part in parts:
+        size += 1 + len(part)
+        kept.append(part)
+        if size > limit:
+            return "\n".join(kept)[:limit] + "\n\n... (truncated)"
+    return "\n".join(kept)
 
 
 # ── JSON-RPC helpers ─────────────────────────────────────────────────────────
@@ -344,53 +568,76 @@ def _jsonrpc_message(
         msg["params"] = params
     if id is not None:
         msg["id"] = id
-    body = json.dumps(msg)
-    return (body + "\n").encode("utf-8")
+    return orjson.dumps(msg) + b"\n"
 
 
-async def _read_jsonrpc_response(stdout: asyncio.StreamReader) -> Dict[str, Any]:
+# The handshake frames are the same for every server; encode them once
+_INITIALIZE_MSG = _jsonrpc_message(
+    "initialize",
+    {
+        "protocolVersion": "2024-11-05",
+        "capabilities": {},
+        "clientInfo": {"name": "whatsapp-bridge", "version": "0.2.0"},
+    },
+    id=1,
+)
+_INITIALIZED_MSG = _jsonrpc_message("notifications/initialized", {})
+
+# LSP-style frame header, matched on the raw line so junk lines (npm
+# banners, logs) are never decoded or lowercased
+_CONTENT_LENGTH = re.compile(rb"content-length:\s*(\d+)$", re.IGNORECASE)
+
+# Non-response output (banners, logs, notifications) tolerated while waiting
+# for one message, so a server spewing junk fails fast instead of spinning
+_JUNK_BUDGET = 64 * 1024
+
+
+async def _read_jsonrpc_response(
+    stdout: asyncio.StreamReader, notifications: bool = False
+) -> Dict[str, Any]:
     """Read a JSON-RPC response from stdout.
 
     Supports both:
     - Raw newline-delimited JSON (FastMCP style)
     - Content-Length framed (LSP / older MCP style)
 
-    Skips notifications (messages without an "id" field) and
-    junk lines (npm output, startup messages).
+    Skips junk lines (npm output, startup messages) and, unless
+    notifications is set, notifications (messages without an "id" field).
+    Gives up after _JUNK_BUDGET bytes of skipped output.
     """
-    max_lines = 200
+    skipped = 0
     content_length = 0
 
-    for _ in range(max_lines):
+    while skipped <= _JUNK_BUDGET:
         line = await stdout.readline()
         if not line:
             return {"error": "Server closed connection (EOF)"}
 
-        line_str = line.decode("utf-8", errors="replace").strip()
-        if not line_str:
+        stripped = line.strip()
+        if not stripped:
             if content_length > 0:
                 body = await stdout.readexactly(content_length)
-                data = json.loads(body.decode("utf-8"))
+                data = orjson.loads(body)
                 content_length = 0
-                if "id" not in data:
-                    continue
-                return data
+                if "id" in data or (notifications and "method" in data):
+                    return data
+                skipped += len(body)
             continue
 
-        if line_str.lower().startswith("content-length:"):
-            try:
-                content_length = int(line_str.split(":", 1)[1].strip())
-            except ValueError:
-                pass
+        header = _CONTENT_LENGTH.match(stripped)
+        if header:
+            content_length = int(header.group(1))
             continue
 
         try:
-            data = json.loads(line_str)
-            if isinstance(data, dict):
-                if "id" not in data:
-                    continue
+            # orjson parses the raw bytes; no decode needed
+            data = orjson.loads(stripped)
+            if isinstance(data, dict) and (
+                "id" in data or (notifications and "method" in data)
+            ):
                 return data
-        except (json.JSONDecodeError, ValueError):
+        except orjson.JSONDecodeError:
             pass
+        skipped += len(line)
 
-    return {"error": "Exceeded max lines without receiving a JSON-RPC response"}
+    return {"error": "Server sent too much output without a JSON-RPC response"}
@@ -57,7 +57,7 @@ class SendWhatsAppMediaTool(BaseTool):
     async def execute(self, media_url: str, caption: str = "", **kwargs) -> str:
         """Send media to the user. The WhatsApp handler is injected at runtime."""
         # The actual sending is handled by main.py which intercepts this tool's
-        # result and calls whatsapp.send_media(). We return a structured marker
+        # result and calls whatsapp.send_media_async(). We return a structured marker
         # that main.py will parse.
         import json
         return json.dumps({
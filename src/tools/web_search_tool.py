@@ -1,9 +1,37 @@
-import json
-import subprocess
-from typing import Any, Dict
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+import orjson
 
 from .base import BaseTool
 
+_DDG_URL = "https://api.duckduckgo.com/"
+
+# Recent successful answers by normalised query: (stored_at, text)
+_CACHE_TTL = 300
+_CACHE_MAX = 512
+_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+# Shared across searches so the TLS connection to DuckDuckGo stays open
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=15.0)
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared search client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 class WebSearchTool(BaseTool):
     """Search the web using a simple HTTP request to DuckDuckGo."""
@@ -35,23 +63,23 @@ class WebSearchTool(BaseTool):
         }
 
     async def execute(self, query: str) -> str:
+        key = query.strip().lower()
+        hit = _cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < _CACHE_TTL:
+            _cache.move_to_end(key)
+            return hit[1]
+
         try:
-            # Use curl to query DuckDuckGo instant answer API
-            result = subprocess.run(
-                [
-                    "curl", "-s",
-                    f"https://api.duckduckgo.com/?q={query}&format=json&no_html=1&skip_disambig=1",
-                ],
-                capture_output=True,
-                text=True,
-                timeout=15,
-                encoding="utf-8",
-                errors="replace",
+            # Query the DuckDuckGo instant answer API
+            resp = await _get_client().get(
+                _DDG_URL,
+                params={"q": query, "format": "json", "no_html": 1, "skip_disambig": 1},
             )
-            if result.returncode != 0:
-                return f"Search failed: {result.stderr}"
+            if resp.is_error:
+                return f"Search failed: HTTP {resp.status_code}"
 
-            data = json.loads(result.stdout)
+            # raw bytes straight into orjson; no decode step
+            data = orjson.loads(resp.content)
             parts = []
 
             # Abstract (main answer)
@@ -72,14 +100,18 @@ class WebSearchTool(BaseTool):
                         parts.append(f"- {topic['Text'][:200]}")
 
             if not parts:
-                # Fallback: try a simple curl to a search engine
                 return f"No instant answer found for '{query}'. Try rephrasing or ask me to run a more specific search."
 
-            return "\n\n".join(parts)
+            result = "\n\n".join(parts)
+            _cache[key] = (time.monotonic(), result)
+            _cache.move_to_end(key)
+            if len(_cache) > _CACHE_MAX:
+                _cache.popitem(last=False)
+            return result
 
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             return "Search returned invalid data."
-        except subprocess.TimeoutExpired:
+        except httpx.TimeoutException:
             return "Search timed out."
         except Exception as e:
             return f"Search error: {e}"
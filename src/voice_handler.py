@@ -10,20 +10,28 @@ Twilio handles all audio. We only deal with text.
 """
 
 import asyncio
-import json
+import functools
+import logging
 import re
-from typing import Any, Dict, List, Optional
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
 
 import anthropic
+import httpx
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
 
+from .claude_client import with_cache_breakpoint
 from .config import settings
+from .conversation_manager import ConversationManager
 from .tools.bash_tool import BashTool
 from .tools.file_tool import FileReadTool
 from .tools.web_search_tool import WebSearchTool
 from .tools.mcp_tool import MCPBridgeTool
 from .tools.base import BaseTool
 
+log = logging.getLogger(__name__)
+
 # ── Voice tools (read-only subset, no approval needed) ───────────
 
 _voice_tools: List[BaseTool] = [
@@ -35,10 +43,44 @@ _voice_tools: List[BaseTool] = [
 
 _voice_tool_map: Dict[str, BaseTool] = {t.name: t for t in _voice_tools}
 _voice_tool_defs = [t.to_api_dict() for t in _voice_tools]
+# Tools that may need approval for some inputs (bash); the rest skip the check
+_voice_gated_tools = frozenset(t.name for t in _voice_tools if t.requires_approval)
 
 # Max tool-use rounds per voice turn (keep calls snappy)
 _MAX_VOICE_TOOL_TURNS = 5
 
+# Tools that finish within this many seconds get no "let me look" filler
+_HOLD_DELAY = 0.4
+
+# Whitespace after sentence-ending punctuation
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+
+# One API client for every call. Turns are separated by the caller
+# speaking, so idle connections are kept for a minute instead of httpx's
+# default five seconds; each turn then reuses the open TLS connection.
+_client: Optional[anthropic.AsyncAnthropic] = None
+
+
+def _get_client() -> anthropic.AsyncAnthropic:
+    global _client
+    if _client is None:
+        _client = anthropic.AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60),
+            ),
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared API client (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
 # ── Voice-specific system prompt ─────────────────────────────────
 
 _VOICE_SYSTEM_PROMPT = """\
@@ -96,6 +138,23 @@ def _build_voice_prompt() -> str:
     return prompt
 
 
+@functools.lru_cache(maxsize=1)
+def _voice_system_blocks() -> list:
+    """The voice prompt as a ``system`` block marked for prompt caching.
+
+    Built once; every turn of every call sends the same prefix (tools and
+    system prompt), so the provider serves it from cache after the first.
+    The history gets its own breakpoint per turn (with_cache_breakpoint).
+    """
+    return [
+        {
+            "type": "text",
+            "text": _build_voice_prompt(),
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+
+
 # ── Session management ───────────────────────────────────────────
 
 class VoiceSession:
@@ -105,14 +164,12 @@ class VoiceSession:
         self.session_id = session_id
         self.call_sid = call_sid
         self.from_number = from_number
-        self.messages: List[Dict[str, Any]] = []
+        # Keep last 20 messages for context (voice conversations are short)
+        self.messages: Deque[Dict[str, Any]] = deque(maxlen=20)
         self.is_processing = False
 
     def add_message(self, role: str, content: Any) -> None:
         self.messages.append({"role": role, "content": content})
-        # Keep last 20 messages for context (voice conversations are short)
-        if len(self.messages) > 20:
-            self.messages = self.messages[-20:]
 
 
 # Active voice sessions
@@ -137,16 +194,33 @@ Output ONLY the greeting text, nothing else.
 """
 
 
+# Greetings started by the /voice webhook, by CallSid, waiting for the
+# call's WebSocket to connect
+_pending_greetings: Dict[str, "asyncio.Task[str]"] = {}
+
+# How long a prefetched greeting waits for its WebSocket (seconds)
+_GREETING_TTL = 60
+
+
+def prefetch_greeting(call_sid: str) -> None:
+    """Start generating the greeting while Twilio is still setting up the call.
+
+    Twilio fetches the TwiML, then opens the ConversationRelay WebSocket;
+    the greeting is usually ready by the time the setup message arrives.
+    This also opens the API connection the rest of the call reuses.
+    """
+    _pending_greetings[call_sid] = asyncio.ensure_future(_generate_greeting())
+    # don't hold on to it if the socket never connects
+    asyncio.get_running_loop().call_later(_GREETING_TTL, _pending_greetings.pop, call_sid, None)
+
+
 async def _generate_greeting() -> str:
     """Generate a unique Holly-style greeting for each call."""
     import random
 
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-
     try:
-        response = await asyncio.to_thread(
-            client.messages.create,
-            model=settings.claude_model,
+        response = await _get_client().messages.create(
+            model=settings.greeting_model,
             max_tokens=120,
             temperature=1.0,
             system=_GREETING_PROMPT,
@@ -159,7 +233,7 @@ async def _generate_greeting() -> str:
         if text:
             return text
     except Exception as e:
-        print(f"[VOICE] Greeting generation failed: {e}", flush=True)
+        log.warning("[VOICE] Greeting generation failed: %s", e)
 
     # Fallback if generation fails
     return "Oh, hello Jay. What can I do for you."
@@ -179,33 +253,34 @@ async def handle_voice_websocket(ws: WebSocket) -> None:
     await ws.accept()
     session: Optional[VoiceSession] = None
 
-    print("[VOICE] WebSocket connection accepted", flush=True)
+    log.info("[VOICE] WebSocket connection accepted")
 
     try:
         while True:
             raw = await ws.receive_text()
-            message = json.loads(raw)
+            message = orjson.loads(raw)
             msg_type = message.get("type", "")
-            print(f"[VOICE] Received message type: {msg_type}", flush=True)
+            log.debug("[VOICE] Received message type: %s", msg_type)
 
             if msg_type == "setup":
                 session_id = message.get("sessionId", "unknown")
                 call_sid = message.get("callSid", "unknown")
                 from_number = message.get("from", "unknown")
-                print(f"[VOICE] Setup: session={session_id}, call={call_sid}, from={from_number}", flush=True)
+                log.info("[VOICE] Setup: session=%s, call=%s, from=%s", session_id, call_sid, from_number)
 
                 session = VoiceSession(session_id, call_sid, from_number)
                 _sessions[session_id] = session
 
-                # Generate a unique greeting for this call
-                greeting = await _generate_greeting()
-                print(f"[VOICE] Greeting: {greeting}", flush=True)
+                # Use the greeting prefetched by the /voice webhook if any
+                pending = _pending_greetings.pop(call_sid, None)
+                greeting = await (pending or _generate_greeting())
+                log.info("[VOICE] Greeting: %s", greeting)
                 await _send_text(ws, greeting)
                 session.add_message("assistant", greeting)
 
             elif msg_type == "prompt":
                 if session is None:
-                    print("[VOICE] Received prompt before setup, ignoring", flush=True)
+                    log.warning("[VOICE] Received prompt before setup, ignoring")
                     continue
 
                 user_text = message.get("voicePrompt", "").strip()
@@ -218,10 +293,10 @@ async def handle_voice_websocket(ws: WebSocket) -> None:
                 if not is_last:
                     continue
 
-                print(f"[VOICE] User said: {user_text}", flush=True)
+                log.info("[VOICE] User said: %s", user_text)
 
                 if session.is_processing:
-                    print("[VOICE] Already processing, skipping", flush=True)
+                    log.info("[VOICE] Already processing, skipping")
                     continue
 
                 session.is_processing = True
@@ -232,36 +307,34 @@ async def handle_voice_websocket(ws: WebSocket) -> None:
 
             elif msg_type == "interrupt":
                 utterance = message.get("utteranceUntilInterrupt", "")
-                print(f"[VOICE] User interrupted. Heard so far: {utterance[:80]}", flush=True)
+                log.info("[VOICE] User interrupted. Heard so far: %s", utterance[:80])
 
             elif msg_type == "dtmf":
                 digit = message.get("digit", "")
-                print(f"[VOICE] DTMF: {digit}", flush=True)
+                log.info("[VOICE] DTMF: %s", digit)
 
             elif msg_type == "error":
                 desc = message.get("description", "unknown error")
-                print(f"[VOICE] Error from Twilio: {desc}", flush=True)
+                log.warning("[VOICE] Error from Twilio: %s", desc)
 
             else:
-                print(f"[VOICE] Unknown message type: {msg_type}", flush=True)
+                log.warning("[VOICE] Unknown message type: %s", msg_type)
 
     except WebSocketDisconnect:
-        print("[VOICE] WebSocket disconnected", flush=True)
+        log.info("[VOICE] WebSocket disconnected")
     except Exception as e:
-        print(f"[VOICE] WebSocket error: {e}", flush=True)
+        log.warning("[VOICE] WebSocket error: %s", e)
     finally:
         if session:
             _sessions.pop(session.session_id, None)
-            print(f"[VOICE] Session {session.session_id} cleaned up", flush=True)
+            log.debug("[VOICE] Session %s cleaned up", session.session_id)
 
 
 # ── Claude with tools for voice ──────────────────────────────────
 
-def _block_dict(block) -> dict:
-    """Convert an API response block to a dict for message history."""
-    if hasattr(block, "model_dump"):
-        return block.model_dump()
-    return block if isinstance(block, dict) else {"type": "text", "text": str(block)}
+# Per-type converter lookup shared with the WhatsApp path; resolves the
+# model_dump method once per block class instead of per block
+_block_dict = ConversationManager._block_to_dict
 
 
 async def _process_voice_turn(
@@ -273,8 +346,8 @@ async def _process_voice_turn(
 
     session.add_message("user", user_text)
 
-    client = anthropic.Anthropic(api_key=settings.anthropic_api_key)
-    system_prompt = _build_voice_prompt()
+    client = _get_client()
+    system_blocks = _voice_system_blocks()
 
     turns = 0
     hold_sent = False
@@ -283,127 +356,142 @@ async def _process_voice_turn(
         while turns < _MAX_VOICE_TOOL_TURNS:
             turns += 1
 
-            # Non-streaming call with tools
-            response = await asyncio.to_thread(
-                client.messages.create,
+            # Streamed call with tools: text is spoken as it is generated
+            async with client.messages.stream(
                 model=settings.claude_model,
                 max_tokens=1024,
-                system=system_prompt,
-                messages=session.messages,
+                system=system_blocks,
+                messages=with_cache_breakpoint(list(session.messages)),
                 tools=_voice_tool_defs,
-            )
-
-            print(f"[VOICE] Turn {turns}: stop_reason={response.stop_reason}", flush=True)
-
-            if response.stop_reason == "end_turn":
-                # Extract text and send to Twilio
-                reply = "".join(
-                    b.text for b in response.content if b.type == "text"
-                )
-                if reply:
-                    await _stream_text_to_ws(ws, reply)
-                    session.add_message("assistant", reply)
-                    print(f"[VOICE] Claude: {reply[:120]}...", flush=True)
-                else:
-                    await _send_text(ws, "I'm not sure how to respond to that. Could you try again?")
-                break
-
-            elif response.stop_reason == "tool_use":
-                # Tell the caller we're working on it (only once)
-                if not hold_sent:
-                    hold_sent = True
-                    await _send_text(ws, "Let me look that up for you.")
+            ) as stream:
+                reply = await _speak_stream(ws, stream.text_stream)
+                response = await stream.get_final_message()
+
+            log.info("[VOICE] Turn %d: stop_reason=%s", turns, response.stop_reason)
 
+            if response.stop_reason == "tool_use":
                 # Store assistant message with tool_use blocks
                 assistant_content = [_block_dict(b) for b in response.content]
                 session.add_message("assistant", assistant_content)
 
-                # Execute each tool
-                tool_results = []
-                for block in response.content:
-                    if block.type != "tool_use":
-                        continue
-
-                    name = block.name
-                    inputs = block.input
-                    tid = block.id
-
-                    print(f"[VOICE] Tool call: {name}({json.dumps(inputs)[:100]})", flush=True)
-
-                    # For voice: skip destructive commands, auto-approve everything else
-                    tool = _voice_tool_map.get(name)
-                    if tool is None:
-                        result = f"Error: unknown tool '{name}'"
-                    elif tool.check_approval(**inputs):
-                        # This tool wants approval (destructive command)
-                        result = (
-                            "This command requires approval and cannot be run during a voice call. "
-                            "Please use the WhatsApp text chat for commands that modify your system."
-                        )
-                        print(f"[VOICE] Refused destructive tool: {name}", flush=True)
-                    else:
-                        result = await tool.execute(**inputs)
-
-                    # Truncate long results for voice context
-                    if len(result) > 2000:
-                        result = result[:2000] + "\n... (truncated)"
-
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tid,
-                        "content": result,
-                    })
+                # Run the tools concurrently; results keep their order
+                tools_done = asyncio.gather(*(
+                    _run_voice_tool(b) for b in response.content if b.type == "tool_use"
+                ))
+
+                # Tell the caller we're working on it, but only if the tools
+                # are slow enough to leave a noticeable silence (once per
+                # turn, and not if Claude already said something)
+                if not hold_sent and not reply:
+                    await asyncio.wait({tools_done}, timeout=_HOLD_DELAY)
+                    if not tools_done.done():
+                        await _send_text(ws, "Let me look that up for you.")
+                hold_sent = True
+
+                tool_results = await tools_done
 
                 # Add tool results and loop for Claude's interpretation
                 session.add_message("user", tool_results)
                 continue
 
+            if reply:
+                # Already spoken; keep it for context
+                session.add_message("assistant", reply)
+                log.info("[VOICE] Claude: %s...", reply[:120])
+            elif response.stop_reason == "end_turn":
+                await _send_text(ws, "I'm not sure how to respond to that. Could you try again?")
             else:
                 await _send_text(ws, "Something unexpected happened. Could you say that again?")
-                break
+            break
 
         if turns >= _MAX_VOICE_TOOL_TURNS:
             await _send_text(ws, "I ran into some complexity there. Could you try a simpler question?")
 
     except Exception as e:
-        print(f"[VOICE] Error: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
+        log.exception("[VOICE] Error: %s", e)
         await _send_text(ws, "Sorry, I hit an error. Could you try again?")
 
 
-async def _stream_text_to_ws(ws: WebSocket, text: str) -> None:
-    """Send text to Twilio in sentence-sized chunks for natural TTS pacing.
+async def _run_voice_tool(block) -> Dict[str, Any]:
+    """Execute one tool_use block and return its tool_result."""
+    name = block.name
+    inputs = block.input
+
+    if log.isEnabledFor(logging.INFO):
+        log.info("[VOICE] Tool call: %s(%s)", name, orjson.dumps(inputs)[:100].decode(errors="replace"))
+
+    # For voice: skip destructive commands, auto-approve everything else
+    tool = _voice_tool_map.get(name)
+    if tool is None:
+        result = f"Error: unknown tool '{name}'"
+    elif name in _voice_gated_tools and tool.check_approval(**inputs):
+        # This tool wants approval (destructive command)
+        result = (
+            "This command requires approval and cannot be run during a voice call. "
+            "Please use the WhatsApp text chat for commands that modify your system."
+        )
+        log.warning("[VOICE] Refused destructive tool: %s", name)
+    else:
+        result = await tool.execute(**inputs)
+
+    # Truncate long results for voice context
+    if len(result) > 2000:
+        result = result[:2000] + "\n... (truncated)"
+
+    return {
+        "type": "tool_result",
+        "tool_use_id": block.id,
+        "content": result,
+    }
+
+
+async def _speak_stream(ws: WebSocket, deltas: AsyncIterator[str]) -> str:
+    """Relay streamed text to Twilio sentence by sentence; return all of it.
 
     ConversationRelay buffers tokens and starts TTS as soon as it has enough,
-    so sending sentence-by-sentence gives good latency without choppy speech.
+    so each sentence is sent the moment it is complete: the caller hears the
+    first one while Claude is still generating the rest. Sends go through a
+    queue drained by a writer task, so a slow socket write never holds up
+    reading the next deltas from the API.
     """
-    # Split on sentence boundaries but keep the delimiter
-    parts = re.split(r'(?<=[.!?])\s+', text)
+    queue: "asyncio.Queue[Optional[tuple]]" = asyncio.Queue()
 
-    for i, part in enumerate(parts):
-        is_last = (i == len(parts) - 1)
-        await ws.send_json({
-            "type": "text",
-            "token": part + (" " if not is_last else ""),
-            "last": False,
-        })
+    async def write() -> None:
+        while (item := await queue.get()) is not None:
+            await _send_token(ws, *item)
 
-    # Signal end of response
-    await ws.send_json({
-        "type": "text",
-        "token": "",
-        "last": True,
-    })
+    writer = asyncio.ensure_future(write())
+    try:
+        parts: List[str] = []
+        pending = ""
+        async for delta in deltas:
+            parts.append(delta)
+            pending += delta
+            # Everything before the last boundary is finished sentences; when
+            # a delta completes several they go out together, in one frame
+            *sentences, pending = _SENTENCE_BREAK.split(pending)
+            if sentences:
+                queue.put_nowait((" ".join(sentences) + " ", False))
+
+        text = "".join(parts)
+        if text:
+            # Whatever is left, and the end-of-response signal
+            queue.put_nowait((pending, True))
+        queue.put_nowait(None)
+        await writer  # re-raises if a send failed
+    finally:
+        writer.cancel()
+    return text
 
 
 async def _send_text(ws: WebSocket, text: str) -> None:
     """Send a complete text message to ConversationRelay."""
-    await ws.send_json({
-        "type": "text",
-        "token": text,
-        "last": True,
-    })
+    await _send_token(ws, text, last=True)
+
+
+async def _send_token(ws: WebSocket, token: str, last: bool) -> None:
+    """Send one ConversationRelay text message (a text frame, via orjson)."""
+    await ws.send_text(orjson.dumps({"type": "text", "token": token, "last": last}).decode())
 
 
 # ── TwiML for incoming voice calls ──────────────────────────────
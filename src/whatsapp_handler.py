@@ -1,34 +1,48 @@
-from typing import List, Optional
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
 
-from twilio.rest import Client
+import httpx
 
 from .config import settings
 
+log = logging.getLogger(__name__)
+
+_TWILIO_API = "https://api.twilio.com/2010-04-01"
+
 
 class WhatsAppHandler:
     """Send WhatsApp messages via Twilio, with automatic chunking."""
 
     def __init__(self) -> None:
-        self.client = Client(settings.twilio_account_sid, settings.twilio_auth_token)
         self.from_number = settings.twilio_whatsapp_from
+        # Sends POST straight to the Messages resource through one pooled
+        # client, so they reuse the TLS connection
+        self._messages_url = (
+            f"{_TWILIO_API}/Accounts/{settings.twilio_account_sid}/Messages.json"
+        )
+        self._async_client = httpx.AsyncClient(
+            auth=(settings.twilio_account_sid, settings.twilio_auth_token),
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=20),
+        )
 
     # ── public API ───────────────────────────────────────────────
 
-    def send_message(self, to_number: str, body: str) -> List[str]:
+    async def send_message_async(self, to_number: str, body: str) -> List[str]:
         """Send *body* to *to_number*, splitting into chunks if needed."""
         to_number = self._normalise(to_number)
-        chunks = self._chunk(body, settings.max_message_length)
-        sids: List[str] = []
-        for i, chunk in enumerate(chunks):
-            if len(chunks) > 1:
-                chunk = f"[{i + 1}/{len(chunks)}]\n\n{chunk}"
-            msg = self.client.messages.create(
-                body=chunk, from_=self.from_number, to=to_number
+        first, *rest = self._numbered_chunks(body)
+        # The first chunk is sent on its own so it lands first; the rest
+        # carry their [i/n] numbers and go out together
+        sids = [await self._create_async({"Body": first, "To": to_number})]
+        if rest:
+            sids += await asyncio.gather(
+                *(self._create_async({"Body": chunk, "To": to_number}) for chunk in rest)
             )
-            sids.append(msg.sid)
         return sids
 
-    def send_media(
+    async def send_media_async(
         self,
         to_number: str,
         media_url: str,
@@ -45,23 +59,42 @@ class WhatsAppHandler:
             The Twilio message SID
         """
         to_number = self._normalise(to_number)
-        kwargs = {
-            "from_": self.from_number,
-            "to": to_number,
-            "media_url": [media_url],
-        }
-        if body:
-            kwargs["body"] = body
-        else:
-            kwargs["body"] = ""
-        msg = self.client.messages.create(**kwargs)
-        print(f"[WHATSAPP] Sent media to {to_number}: {media_url[:80]}... SID={msg.sid}", flush=True)
-        return msg.sid
-
-    def send_approval_request(
+        sid = await self._create_async(
+            {"Body": body or "", "To": to_number, "MediaUrl": media_url}
+        )
+        log.info("[WHATSAPP] Sent media to %s: %s... SID=%s", to_number, media_url[:80], sid)
+        return sid
+
+    async def send_approval_request_async(
         self, to_number: str, description: str, approval_id: str
     ) -> str:
-        body = (
+        """Ask the user to APPROVE or DENY a pending tool call."""
+        body = self._approval_body(description, approval_id)
+        return await self._create_async({"Body": body, "To": self._normalise(to_number)})
+
+    async def aclose(self) -> None:
+        """Close the pooled Twilio client (called on app shutdown)."""
+        await self._async_client.aclose()
+
+    # ── helpers ───────────────────────────────────────────────────
+
+    async def _create_async(self, fields: Dict[str, Any]) -> str:
+        """POST one message to Twilio's Messages resource and return its SID."""
+        resp = await self._async_client.post(
+            self._messages_url, data={"From": self.from_number, **fields}
+        )
+        resp.raise_for_status()
+        return resp.json()["sid"]
+
+    def _numbered_chunks(self, body: str) -> List[str]:
+        chunks = self._chunk(body, settings.max_message_length)
+        if len(chunks) > 1:
+            chunks = [f"[{i + 1}/{len(chunks)}]\n\n{c}" for i, c in enumerate(chunks)]
+        return chunks
+
+    @staticmethod
+    def _approval_body(description: str, approval_id: str) -> str:
+        return (
             f"\U0001f510 *APPROVAL REQUIRED*\n\n"
             f"{description}\n\n"
             f"Reply with:\n"
@@ -69,13 +102,6 @@ class WhatsAppHandler:
             f"  DENY {approval_id}\n\n"
             f"\u23f1 Expires in 5 minutes"
         )
-        to_number = self._normalise(to_number)
-        msg = self.client.messages.create(
-            body=body, from_=self.from_number, to=to_number
-        )
-        return msg.sid
-
-    # ── helpers ───────────────────────────────────────────────────
 
     @staticmethod
     def _normalise(number: str) -> str:
@@ -87,33 +113,50 @@ class WhatsAppHandler:
             return [text]
 
         chunks: List[str] = []
-        current = ""
+        # the chunk being built, as pieces joined once when it is flushed,
+        # and its length kept as a running total
+        current: List[str] = []
+        size = 0
 
         for para in text.split("\n\n"):
             # paragraph fits in current chunk
-            if len(current) + len(para) + 2 <= limit:
-                current += ("" if not current else "\n\n") + para
+            if size + len(para) + 2 <= limit:
+                if size:
+                    current.append("\n\n")
+                    size += 2
+                current.append(para)
+                size += len(para)
                 continue
 
             # flush current chunk
-            if current:
-                chunks.append(current)
-                current = ""
+            if size:
+                chunks.append("".join(current))
+                current = []
+                size = 0
 
             # paragraph itself is too long -> split on sentences
             if len(para) > limit:
                 for sentence in para.split(". "):
                     piece = sentence if sentence.endswith(".") else sentence + ". "
-                    if len(current) + len(piece) <= limit:
-                        current += piece
+                    if size + len(piece) <= limit:
+                        current.append(piece)
+                        size += len(piece)
                     else:
-                        if current:
-                            chunks.append(current.strip())
-                        current = piece
+                        if size:
+                            chunks.append("".join(current).strip())
+                        # no sentence breaks at all (a log dump): hard split
+                        if len(piece.strip()) > limit:
+                            piece = piece.strip()
+                            while len(piece) > limit:
+                                chunks.append(piece[:limit])
+                                piece = piece[limit:]
+                        current = [piece]
+                        size = len(piece)
             else:
-                current = para
+                current = [para]
+                size = len(para)
 
-        if current:
-            chunks.append(current.strip())
+        if size:
+            chunks.append("".join(current).strip())
 
         return chunks